@@ -0,0 +1,28 @@
+"""Add id_sequences for block-allocated application IDs
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One counter per year, advanced a block at a time by app.core.application_ids
+    op.create_table('id_sequences',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('next_value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('id_sequences')
@@ -1,39 +1,55 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
 from app.database import get_db
 from app.models.user import User, UserRole
-from app.core.security import ALGORITHM
-from app.config import settings
+from app.core.security import decode_access_token
+from app.core.user_cache import get_cached_user, cache_user
+from app.core.activity import record_activity
+from app.core.token_store import is_token_revoked
 from typing import Optional
 
 security = HTTPBearer()
 
+def load_user(db: Session, username: str) -> Optional[User]:
+    """Load a user by username, served from the principal cache when possible"""
+    user = get_cached_user(db, username)
+    if user is None:
+        user = db.query(User).filter(User.username == username).first()
+        if user is not None:
+            cache_user(user)
+    return user
+
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user"""
+    """
+    Resolve the authenticated user for this request.
+
+    This is the single authentication path: the token is decoded once and
+    the user is stored on request.state.principal, so every role check
+    (staff, supervisor, admin) reuses the same principal.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.SECRET_KEY, 
-            algorithms=[ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or is_token_revoked(payload):
+        raise credentials_exception
+    username: str = payload.get("sub")
+    if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = load_user(db, username)
     if user is None:
         raise credentials_exception
     
@@ -43,6 +59,9 @@ def get_current_user(
             detail="Inactive user"
         )
     
+    request.state.principal = user
+    request.state.token_payload = payload
+    record_activity(user.id)
     return user
 
 def get_current_active_user(
@@ -97,17 +116,9 @@ def get_optional_current_user(
     if not credentials:
         return None
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None or is_token_revoked(payload):
         return None
     
-    user = db.query(User).filter(User.username == username).first()
+    user = load_user(db, payload["sub"])
     return user if user and user.is_active else None
\ No newline at end of file
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
-from app.models.application import Application, StatusUpdate, ApplicationStatus
+from app.config import settings
+from app.models.application import Application, StatusUpdate, ApplicationStatus, Document
 from app.schemas.application import (
     ApplicationCreate, ApplicationResponse, ApplicationStatusCheck,
     StatusUpdateCreate, StatusUpdateResponse, ApplicationUpdate
 )
-from app.core.notifications import send_status_notification
-from app.utils.helpers import generate_application_id, calculate_estimated_completion
+from app.core.status_cache import (
+    CachedStatus, get_cached_status, cache_status, make_etag, etag_matches
+)
+from app.core.id_guard import guard_application_lookup
+from app.core.events import publish, ApplicationSubmitted, DocumentUploaded
+from app.core.push import PushEvent, SSE_HEADERS, push_broker, application_topic, event_stream
+from app.utils.helpers import calculate_estimated_completion
+from app.core.application_ids import generate_application_id
+import hmac
+import json
+import os
 import uuid
 from datetime import datetime
 import logging
@@ -19,7 +31,6 @@ router = APIRouter()
 @router.post("/", response_model=ApplicationResponse)
 async def create_application(
     application: ApplicationCreate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Submit a new application"""
@@ -56,38 +67,16 @@ async def create_application(
         )
         
         db.add(db_application)
+        # Initial status history row and confirmation email are event subscribers
+        publish(db, ApplicationSubmitted(
+            application_id=app_id,
+            email=application.email,
+            language=application.language_preference
+        ))
         db.commit()
         db.refresh(db_application)
         logger.info(f"Application saved to database with ID: {app_id}")
         
-        # Create initial status update
-        status_update = StatusUpdate(
-            id=str(uuid.uuid4()),
-            application_id=app_id,
-            old_status=None,
-            new_status=ApplicationStatus.EINGEGANGEN,
-            message="Application submitted successfully",
-        )
-        
-        db.add(status_update)
-        db.commit()
-        logger.info(f"Initial status update created for application: {app_id}")
-        
-        # Send confirmation notification
-        try:
-            background_tasks.add_task(
-                send_status_notification,
-                application.email,
-                app_id,
-                ApplicationStatus.EINGEGANGEN,
-                f"Your application has been received. Reference number: {app_id}",
-                application.language_preference
-            )
-            logger.info(f"Notification task added for application: {app_id}")
-        except Exception as e:
-            logger.error(f"Error adding notification task: {e}")
-            # Don't fail the application creation if notification fails
-        
         response_data = {
             "id": str(db_application.id),
             "type": db_application.application_type.value if hasattr(db_application.application_type, 'value') else str(db_application.application_type).split('.')[-1].lower(), 
@@ -122,13 +111,56 @@ async def create_application(
             status_code=500,
             detail=f"Failed to create application: {str(e)}"
         )
+
+
+def build_status_response_data(application: Application) -> dict:
+    """Public status-check payload of an application"""
+    # Calculate progress percentage
+    progress_map = {
+        ApplicationStatus.EINGEGANGEN: 10,
+        ApplicationStatus.IN_BEARBEITUNG: 30,
+        ApplicationStatus.NACHFRAGE: 45,
+        ApplicationStatus.PRUEFUNG: 70,
+        ApplicationStatus.ENTSCHEIDUNG: 85,
+        ApplicationStatus.ABGESCHLOSSEN: 100,
+        ApplicationStatus.ABGELEHNT: 100,
+    }
+    response_data = {
+        "id": str(application.id),
+        "type": application.application_type.value if hasattr(application.application_type, 'value') else str(application.application_type).split('.')[-1].lower(), 
+        "email": str(application.email),
+        "firstName": str(application.first_name),
+        "lastName": str(application.last_name),
+        "birthDate": application.date_of_birth,
+        "phone": str(application.phone) if application.phone else None,
+        "nationality": str(application.nationality),
+        "address": str(application.address),
+        "language_preference": str(application.language_preference),
+        "status": application.status or ApplicationStatus.EINGEGANGEN,
+        "estimated_completion": application.estimated_completion,
+        "submitted_at": application.submitted_at or datetime.now(),
+        "updated_at": getattr(application, 'updated_at', None) or datetime.now(),
+        "priority": "normal",
+        "actual_completion": None,
+        "case_worker_id": None,
+        "notes": None,
+        "is_urgent": False,
+        "requires_appointment": False,
+        "documents_complete": False,
+        "progress_percentage": progress_map.get(application.status, 0)
+    }
+    return response_data
+
+
 @router.post("/check-status", response_model=ApplicationResponse)
 async def check_application_status(
     status_check: ApplicationStatusCheck,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Check application status using application ID and date of birth"""
     
+    await guard_application_lookup(request, status_check.application_id)
     try:
         logger.info(f"Checking status for application: {status_check.application_id}")
         
@@ -144,42 +176,66 @@ async def check_application_status(
                 detail="Application not found or invalid credentials"
             )
         
-        # Calculate progress percentage
-        progress_map = {
-            ApplicationStatus.EINGEGANGEN: 10,
-            ApplicationStatus.IN_BEARBEITUNG: 30,
-            ApplicationStatus.NACHFRAGE: 45,
-            ApplicationStatus.PRUEFUNG: 70,
-            ApplicationStatus.ENTSCHEIDUNG: 85,
-            ApplicationStatus.ABGESCHLOSSEN: 100,
-            ApplicationStatus.ABGELEHNT: 100,
-        }
-        response_data = {
-            "id": str(application.id),
-            "type": application.application_type.value if hasattr(application.application_type, 'value') else str(application.application_type).split('.')[-1].lower(), 
-            "email": str(application.email),
-            "firstName": str(application.first_name),
-            "lastName": str(application.last_name),
-            "birthDate": application.date_of_birth,
-            "phone": str(application.phone) if application.phone else None,
-            "nationality": str(application.nationality),
-            "address": str(application.address),
-            "language_preference": str(application.language_preference),
-            "status": ApplicationStatus.EINGEGANGEN,
-            "estimated_completion": application.estimated_completion,
-            "submitted_at": getattr(application, 'created_at', None) or datetime.now(),
-            "updated_at": getattr(application, 'updated_at', None) or datetime.now(),
-            "priority": "normal",
-            "actual_completion": None,
-            "case_worker_id": None,
-            "notes": None,
-            "is_urgent": False,
-            "requires_appointment": False,
-            "documents_complete": False,
-            "progress_percentage": progress_map.get(application.status, 0)
-        }
+        return ApplicationResponse(**build_status_response_data(application))
         
-        return ApplicationResponse(**response_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error checking application status: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to check application status"
+        )
+
+@router.get("/check-status", response_model=ApplicationResponse)
+async def check_application_status_cached(
+    application_id: str,
+    date_of_birth: str,
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Check application status (cacheable GET variant).
+
+    Responses carry a strong ETag hashed from the serialized response body,
+    so any change to what the citizen sees gets a new tag; clients polling
+    with If-None-Match get 304 Not Modified. Serialized responses are cached
+    briefly per application and dropped on any change.
+    """
+    
+    await guard_application_lookup(request, application_id)
+    try:
+        cached = await get_cached_status(application_id)
+        # compare_digest only accepts ASCII str, so compare the UTF-8 bytes
+        if cached is None or not hmac.compare_digest(
+            cached.date_of_birth.encode("utf-8"), date_of_birth.encode("utf-8")
+        ):
+            application = db.query(Application).filter(
+                Application.id == application_id,
+                Application.date_of_birth == date_of_birth
+            ).first()
+            
+            if not application:
+                logger.warning(f"Application not found: {application_id}")
+                raise HTTPException(
+                    status_code=404,
+                    detail="Application not found or invalid credentials"
+                )
+            
+            response = ApplicationResponse(**build_status_response_data(application))
+            body = json.dumps(jsonable_encoder(response)).encode("utf-8")
+            cached = CachedStatus(
+                date_of_birth=application.date_of_birth,
+                etag=make_etag(body),
+                body=body
+            )
+            await cache_status(application_id, cached)
+        
+        headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
@@ -190,14 +246,64 @@ async def check_application_status(
             detail="Failed to check application status"
         )
 
+@router.get("/{application_id}/events")
+async def stream_application_events(
+    application_id: str,
+    date_of_birth: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream status transitions of an application as Server-Sent Events.
+
+    The first event carries the current status; after that an event is sent
+    whenever staff change the status or assignment, replacing polling of
+    check-status.
+    """
+    
+    await guard_application_lookup(request, application_id)
+    application = db.query(Application).filter(
+        Application.id == application_id,
+        Application.date_of_birth == date_of_birth
+    ).first()
+    
+    if not application:
+        raise HTTPException(
+            status_code=404,
+            detail="Application not found or invalid credentials"
+        )
+    
+    initial = PushEvent(0, "status", {
+        "application_id": application.id,
+        "new_status": application.status.value,
+        "at": (application.updated_at or application.submitted_at or datetime.utcnow()).isoformat(),
+    })
+    # Return the connection to the pool; the stream may stay open for hours
+    db.close()
+    
+    subscription = push_broker.subscribe(application_topic(application_id))
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many open event streams, please poll check-status",
+            headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        event_stream(subscription, request.is_disconnected, initial),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/{application_id}/history", response_model=List[StatusUpdateResponse])
 async def get_application_history(
     application_id: str,
     date_of_birth: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Get application status history"""
     
+    await guard_application_lookup(request, application_id)
     try:
         logger.info(f"Getting history for application: {application_id}")
         
@@ -229,15 +335,34 @@ async def get_application_history(
             detail="Failed to get application history"
         )
 
+async def save_upload(file: UploadFile, upload_dir: str, file_path: str) -> int:
+    """Copy an upload to disk in chunks, enforcing MAX_FILE_SIZE; returns its size"""
+    os.makedirs(upload_dir, exist_ok=True)
+    size = 0
+    with open(file_path, "wb") as out:
+        while chunk := await file.read(1024 * 1024):
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                out.close()
+                os.remove(file_path)
+                raise HTTPException(
+                    status_code=413,
+                    detail="File too large. Maximum size is 10MB."
+                )
+            out.write(chunk)
+    return size
+
 @router.post("/{application_id}/upload-document")
 async def upload_document(
     application_id: str,
     date_of_birth: str,
+    request: Request,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
     """Upload document for application"""
     
+    await guard_application_lookup(request, application_id)
     try:
         logger.info(f"Uploading document for application: {application_id}")
         
@@ -274,15 +399,44 @@ async def upload_document(
                 detail="Invalid file type. Allowed types: PDF, JPG, PNG, DOC, DOCX"
             )
         
-        # TODO: Implement file saving logic
-        # This would involve saving the file to disk/cloud storage
-        # and creating a Document record in the database
+        # Save the file under a generated name, then record it
+        document_id = str(uuid.uuid4())
+        extension = os.path.splitext(file.filename)[1].lower()
+        upload_dir = os.path.join(settings.UPLOAD_DIR, application_id)
+        file_path = os.path.join(upload_dir, f"{document_id}{extension}")
+        size = await save_upload(file, upload_dir, file_path)
+        
+        document = Document(
+            id=document_id,
+            application_id=application_id,
+            filename=f"{document_id}{extension}",
+            original_filename=file.filename,
+            file_path=file_path,
+            file_size=str(size),
+            mime_type=file.content_type,
+            uploaded_by="citizen"
+        )
+        try:
+            db.add(document)
+            db.flush()
+            # Announced only once the row exists; a failed commit drops both
+            publish(db, DocumentUploaded(
+                application_id=application_id,
+                filename=file.filename,
+                size=size
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            os.remove(file_path)
+            raise
         
         logger.info(f"Document uploaded successfully: {file.filename}")
         return {
             "message": "Document uploaded successfully",
+            "document_id": document_id,
             "filename": file.filename,
-            "size": file.size or 0
+            "size": size
         }
         
     except HTTPException:
@@ -298,10 +452,12 @@ async def upload_document(
 async def get_application_documents(
     application_id: str,
     date_of_birth: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Get list of documents for application"""
     
+    await guard_application_lookup(request, application_id)
     try:
         logger.info(f"Getting documents for application: {application_id}")
         
@@ -318,13 +474,24 @@ async def get_application_documents(
                 detail="Application not found or invalid credentials"
             )
         
-        # TODO: Implement getting documents from database
-        # This would query Document table for this application
+        documents = db.query(Document).filter(
+            Document.application_id == application_id
+        ).order_by(Document.uploaded_at).all()
         
         return {
             "message": "Documents retrieved successfully",
             "application_id": application_id,
-            "documents": []  # Return actual documents when implemented
+            "documents": [
+                {
+                    "id": document.id,
+                    "filename": document.original_filename,
+                    "size": int(document.file_size or 0),
+                    "mime_type": document.mime_type,
+                    "uploaded_at": document.uploaded_at,
+                    "is_verified": document.is_verified
+                }
+                for document in documents
+            ]
         }
         
     except HTTPException:
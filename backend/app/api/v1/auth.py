@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserLogin, Token, UserCreate, UserResponse, PasswordChange, PasswordReset, PasswordResetConfirm
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
-from app.api.deps import get_current_active_user
+from app.core.security import (
+    verify_password_async, get_password_hash_async, password_needs_rehash,
+    create_access_token, verify_token
+)
+from app.core.token_store import refresh_token_store, revoke_token, RefreshTokenReuse
+from app.api.deps import get_current_active_user, load_user
+from app.core.user_cache import invalidate_user_async
+from app.core.rate_limit import throttle_login, reset_login_throttle
+from app.core.activity import record_login, record_activity
 from app.config import settings
 from app.utils.email import send_password_reset_email
+from app.utils.helpers import get_client_ip
 import uuid
 from datetime import datetime
 
@@ -16,13 +25,17 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Authenticate user and return access token"""
+    # Reject throttled attempts before touching the database or bcrypt
+    await run_in_threadpool(throttle_login, form_data.username, get_client_ip(request))
+    
     user = db.query(User).filter(User.username == form_data.username).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -35,17 +48,22 @@ async def login(
             detail="Inactive user"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    user.last_activity = datetime.utcnow()
-    db.commit()
+    await run_in_threadpool(reset_login_throttle, form_data.username)
+    
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+        db.commit()
+    
+    # Update last login (written behind in the next activity flush)
+    record_login(user.id)
     
     # Create tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    refresh_token = await run_in_threadpool(refresh_token_store.issue, user.username)
     
     return {
         "access_token": access_token,
@@ -77,7 +95,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         id=str(uuid.uuid4()),
         username=user_data.username,
@@ -104,39 +122,31 @@ async def refresh_token(
     refresh_token: str,
     db: Session = Depends(get_db)
 ):
-    """Refresh access token using refresh token"""
-    try:
-        from jose import jwt, JWTError
-        payload = jwt.decode(
-            refresh_token, 
-            settings.SECRET_KEY, 
-            algorithms=["HS256"]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token"
-        )
+    """Refresh access token using refresh token (rotates the refresh token)"""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token"
+    )
     
-    user = db.query(User).filter(User.username == username).first()
+    payload = verify_token(refresh_token)
+    if not payload or payload.get("type") != "refresh" or payload.get("sub") is None:
+        raise invalid_token
+    username: str = payload["sub"]
+    
+    user = load_user(db, username)
     if not user or not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token"
-        )
+        raise invalid_token
+    
+    try:
+        new_refresh_token = await run_in_threadpool(refresh_token_store.rotate, payload)
+    except RefreshTokenReuse:
+        raise invalid_token
     
     # Create new access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    new_refresh_token = create_refresh_token(data={"sub": user.username})
     
     return {
         "access_token": access_token,
@@ -159,15 +169,16 @@ async def change_password(
     db: Session = Depends(get_db)
 ):
     """Change user password"""
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.hashed_password = await get_password_hash_async(password_data.new_password)
     current_user.updated_at = datetime.utcnow()
     db.commit()
+    await run_in_threadpool(refresh_token_store.revoke_user, current_user.username)
     
     return {"message": "Password changed successfully"}
 
@@ -233,19 +244,22 @@ async def reset_password(
         )
     
     # Update password
-    user.hashed_password = get_password_hash(password_reset.new_password)
+    user.hashed_password = await get_password_hash_async(password_reset.new_password)
     user.updated_at = datetime.utcnow()
     db.commit()
+    await run_in_threadpool(refresh_token_store.revoke_user, user.username)
     
     return {"message": "Password reset successfully"}
 
 @router.post("/logout")
 async def logout(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
 ):
-    """Logout user (update last activity)"""
-    current_user.last_activity = datetime.utcnow()
-    db.commit()
+    """Logout user: revoke the access token and all refresh tokens"""
+    await run_in_threadpool(revoke_token, request.state.token_payload)
+    await run_in_threadpool(refresh_token_store.revoke_user, current_user.username)
+    record_activity(current_user.id)
+    await invalidate_user_async(current_user.username)
     
     return {"message": "Logged out successfully"}
\ No newline at end of file
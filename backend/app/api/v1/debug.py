@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.profiling import Profile, profile_store
+from app.core.loop_monitor import loop_monitor
+
+router = APIRouter()
+
+def _get_profile(profile_id: str) -> Profile:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recent request profiles of this worker, newest first"""
+    return [profile.overview() for profile in profile_store.list()]
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, top: int = 30):
+    """Time per package and the hottest functions of one profile"""
+    return _get_profile(profile_id).summary(top)
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str):
+    """Folded stacks for flamegraph.pl or speedscope"""
+    return _get_profile(profile_id).folded()
+
+@router.delete("/profiles")
+async def clear_profiles():
+    """Drop all stored profiles"""
+    profile_store.clear()
+    return {"message": "Profiles cleared"}
+
+@router.get("/loop")
+async def get_loop_lag():
+    """Event loop lag percentiles and the most recent stalls of this worker"""
+    return {
+        "lag_seconds": {f"p{int(q * 100)}": round(value, 4) for q, value in loop_monitor.lag_quantiles().items()},
+        "stalls": loop_monitor.recent_stalls(),
+    }
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from typing import List, Optional
@@ -11,9 +12,11 @@ from app.schemas.application import (
     ApplicationSummary, ApplicationList
 )
 from app.api.deps import get_current_staff_user, get_current_supervisor_user
-from app.core.notifications import send_status_notification
+from app.core.status_cache import invalidate_status_cache
+from app.core.dashboard_cache import cached_dashboard_summary, invalidate_dashboards
+from app.core.push import SSE_HEADERS, push_broker, staff_topic, event_stream
+from app.core.events import publish, StatusChanged, Assigned
 from app.utils.helpers import calculate_progress_percentage
-import uuid
 
 router = APIRouter()
 
@@ -24,6 +27,14 @@ async def get_dashboard_summary(
 ):
     """Get dashboard summary statistics"""
     
+    # Supervisors share one summary, staff get one per user
+    scope = current_user.id if current_user.role.value == "staff" else "all"
+    summary = await cached_dashboard_summary(scope, lambda: compute_dashboard_summary(db, current_user))
+    return ApplicationSummary(**summary)
+
+def compute_dashboard_summary(db: Session, current_user: User) -> dict:
+    """Dashboard statistics as stored in the dashboard cache"""
+    
     # Base query - supervisors see all, staff see only assigned
     base_query = db.query(Application)
     if current_user.role.value == "staff":
@@ -107,7 +118,7 @@ async def get_dashboard_summary(
         applications_by_status=applications_by_status,
         applications_by_type=applications_by_type,
         average_processing_time=average_processing_time
-    )
+    ).model_dump()
 
 @router.get("/applications", response_model=ApplicationList)
 async def get_applications(
@@ -237,6 +248,8 @@ async def update_application(
     
     db.commit()
     db.refresh(application)
+    await invalidate_status_cache(application_id)
+    await invalidate_dashboards()
     
     return ApplicationResponse(
         **application.__dict__,
@@ -247,7 +260,6 @@ async def update_application(
 async def update_application_status(
     application_id: str,
     status_update: StatusUpdateCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_staff_user),
     db: Session = Depends(get_db)
 ):
@@ -277,30 +289,18 @@ async def update_application_status(
     if status_update.new_status == ApplicationStatus.IN_BEARBEITUNG and not application.case_worker_id:
         application.case_worker_id = current_user.id
     
-    db.commit()
-    
-    # Create status update record
-    db_status_update = StatusUpdate(
-        id=str(uuid.uuid4()),
+    # History row, cache invalidation, push and notification are event subscribers
+    publish(db, StatusChanged(
         application_id=application_id,
         old_status=old_status,
         new_status=status_update.new_status,
         message=status_update.message,
-    )
-    
-    db.add(db_status_update)
+        email=application.email,
+        language=application.language_preference,
+        case_worker_id=application.case_worker_id
+    ))
     db.commit()
     
-    # Send notification
-    background_tasks.add_task(
-        send_status_notification,
-        application.email,
-        application_id,
-        status_update.new_status,
-        status_update.message,
-        application.language_preference
-    )
-    
     return {"message": "Status updated successfully"}
 
 @router.post("/applications/{application_id}/assign")
@@ -327,26 +327,48 @@ async def assign_application(
     application.updated_at = datetime.utcnow()
     
     # Move to in progress if still pending
+    old_status = application.status
     if application.status == ApplicationStatus.EINGEGANGEN:
         application.status = ApplicationStatus.IN_BEARBEITUNG
     
-    db.commit()
-    
-    # Create status update record
-    message = f"Application assigned to {case_worker.full_name}"
-    status_update = StatusUpdate(
-        id=str(uuid.uuid4()),
+    publish(db, Assigned(
         application_id=application_id,
-        old_status=application.status,
-        new_status=application.status,
-        message=message,
-    )
-    
-    db.add(status_update)
+        status=application.status,
+        old_worker_id=old_worker_id,
+        new_worker_id=case_worker_id,
+        message=f"Application assigned to {case_worker.full_name}",
+        old_status=old_status,
+        email=application.email,
+        language=application.language_preference
+    ))
     db.commit()
     
     return {"message": f"Application assigned to {case_worker.full_name}"}
 
+@router.get("/events")
+async def stream_staff_events(
+    request: Request,
+    current_user: User = Depends(get_current_staff_user),
+    db: Session = Depends(get_db)
+):
+    """Stream status changes and assignments of the current user's queue (SSE)"""
+    
+    # Authentication is done; don't hold a pooled connection for the stream
+    db.close()
+    
+    subscription = push_broker.subscribe(staff_topic(current_user.id))
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many open event streams",
+            headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        event_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/applications/{application_id}/history")
 async def get_application_status_history(
     application_id: str,
@@ -1,7 +1,11 @@
 # app/config.py
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional, List
 
+# Only used with DEBUG on; IDs scrambled with it are guessable
+DEVELOPMENT_SCRAMBLE_KEY = "development-application-ids"
+
 
 class Settings(BaseSettings):
     # Database settings
@@ -12,11 +16,93 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Login throttling (token buckets per client IP and per username);
+    # RATE_LIMIT_BACKEND "memory" limits per worker, "redis" across all workers
+    RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_PER_MINUTE_IP: float = 20
+    LOGIN_BURST_IP: int = 20
+    LOGIN_RATE_PER_MINUTE_USER: float = 5
+    LOGIN_BURST_USER: int = 5
+    
+    # Shared cache ("memory" per worker, or "redis" shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    CACHE_KEY_PREFIX: str = "lb"
+    CACHE_LOCK_TIMEOUT_SECONDS: float = 5.0
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    
+    # Revoked tokens and refresh-token families ("memory" per process, or "redis")
+    TOKEN_STORE_BACKEND: str = "memory"
+    
+    # Authenticated user cache (0 TTL disables it)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+    
+    # Public status-check response cache (0 TTL disables it)
+    STATUS_CACHE_TTL_SECONDS: int = 10
+    STATUS_CACHE_MAX_SIZE: int = 10000
+    
+    # Public lookups by application ID (per-IP budget and membership filter);
+    # ID_FILTER_BACKEND "memory" only learns this worker's new IDs, "redis" those of all processes
+    LOOKUP_RATE_PER_MINUTE_IP: float = 60
+    LOOKUP_BURST_IP: int = 30
+    ID_FILTER_BACKEND: str = "memory"
+    BLOOM_MIN_CAPACITY: int = 100000
+    BLOOM_ERROR_RATE: float = 0.01
+    BLOOM_REBUILD_SECONDS: float = 3600  # full rescan for rows written outside the app (0 = never)
+    
+    # Application IDs (LB-YYYY-NNNNNNNN-C); the scramble key is a secret that must never
+    # change, required unless DEBUG (which falls back to a fixed development key)
+    APPLICATION_ID_BLOCK_SIZE: int = 1000  # IDs reserved per database round-trip
+    APPLICATION_ID_SCRAMBLE_KEY: Optional[str] = None
+    
+    # Server-Sent Event streams ("memory": per worker, run one; "redis": fan-out to all workers)
+    PUSH_BACKEND: str = "memory"
+    PUSH_MAX_SUBSCRIBERS: int = 5000
+    PUSH_QUEUE_SIZE: int = 100
+    PUSH_HEARTBEAT_SECONDS: float = 15.0
+    PUSH_RETRY_MILLISECONDS: int = 5000
+    
+    # Write-behind interval for users.last_activity / last_login
+    ACTIVITY_FLUSH_SECONDS: float = 5.0
+    
     # App settings
     APP_NAME: str = "Leipzig Bürgerbüro System"
     ENVIRONMENT: str = "development"
     DEBUG: bool = True  # Set to True for development, False for production
     
+    # Production server (python -m app.server)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # default: number of available CPUs
+    MAX_REQUESTS: int = 10000  # recycle a worker after this many requests (0 = never)
+    MAX_REQUESTS_JITTER: int = 1000
+    SHUTDOWN_DRAIN_SECONDS: int = 20
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    # Reverse proxies (IPs or CIDR networks, comma-separated) whose X-Forwarded-For /
+    # X-Real-IP headers are trusted for rate limiting; empty = use the peer address
+    TRUSTED_PROXIES: str = ""
+    METRICS_ENABLED: bool = True  # Prometheus endpoint at /metrics
+    
+    # Request profiling (admin only, /debug/profiles); off unless DEBUG or PROFILING_ENABLED
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: int = 0  # also profile every Nth request (0 = on request only)
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_MAX_STORED: int = 50  # per worker process
+    
+    # Event loop lag monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.1
+    LOOP_LAG_THRESHOLD_SECONDS: float = 0.1  # report blocking calls longer than this
+    LOOP_LAG_WINDOW: int = 600  # samples behind the lag percentiles (one minute)
+    
     # CORS settings
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001"
     
@@ -25,15 +111,61 @@ class Settings(BaseSettings):
     SMTP_PORT: Optional[int] = None
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = True
+    EMAIL_FROM: str = "noreply@leipzig.de"
+    FRONTEND_URL: str = "http://localhost:3000"
+    
+    # Notification settings
+    NOTIFICATION_COALESCE_MINUTES: int = 5  # 0 disables coalescing
+    
+    # Email delivery settings
+    EMAIL_RATE_PER_SECOND: float = 5.0
+    EMAIL_BURST: int = 10
+    EMAIL_MAX_CONCURRENCY: int = 4
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: float = 2.0
+    EMAIL_RETRY_MAX_SECONDS: float = 600.0
+    EMAIL_BREAKER_FAILURE_THRESHOLD: int = 5
+    EMAIL_BREAKER_RESET_SECONDS: float = 30.0
+    
+    # Where queued emails are sent from: "scheduler" (in the API process) or "celery"
+    EMAIL_DELIVERY: str = "scheduler"
+    
+    # Daily staff summary (enable on exactly one process, or run via cron or Celery beat)
+    DAILY_SUMMARY_ENABLED: bool = False
+    DAILY_SUMMARY_HOUR: int = 18
     
     # File upload settings
     ALLOWED_EXTENSIONS: str = "pdf,jpg,jpeg,png,doc,docx"
     ALLOWED_HOSTS: List[str] = ["http://localhost", "http://127.0.0.1", "http://localhost:8000"]
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     
+    UPLOAD_DIR: str = "uploads"
+    EXPORT_DIR: str = "exports"
+    
+    # Celery (memory:// broker with eager mode runs tasks inline without a broker)
+    CELERY_BROKER_URL: str = "memory://"
+    CELERY_RESULT_BACKEND: Optional[str] = None
+    CELERY_TASK_ALWAYS_EAGER: bool = True
+    IMPORT_BATCH_SIZE: int = 1000
+    PREVIEW_MAX_SIZE: int = 512
+    
+    # Outgoing mail attachment cache (encoded bytes)
+    ATTACHMENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+    ATTACHMENT_CACHE_MAX_ITEM_BYTES: int = 8 * 1024 * 1024  # larger files are streamed
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     
+    @model_validator(mode="after")
+    def require_production_secrets(self):
+        if not self.APPLICATION_ID_SCRAMBLE_KEY:
+            if not self.DEBUG:
+                # Anyone knowing the key can enumerate valid application IDs
+                raise ValueError("APPLICATION_ID_SCRAMBLE_KEY must be set when DEBUG is off")
+            self.APPLICATION_ID_SCRAMBLE_KEY = DEVELOPMENT_SCRAMBLE_KEY
+        return self
+    
     # Configure the settings
     model_config = SettingsConfigDict(
         env_file=".env",
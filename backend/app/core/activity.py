@@ -0,0 +1,98 @@
+from sqlalchemy import update
+from datetime import datetime
+from typing import Dict, Optional
+from app.database import SessionLocal
+from app.models.user import User
+from app.config import settings
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    """
+    Write-behind buffer for users.last_activity / users.last_login.
+
+    Requests only record a timestamp in memory; repeated activity of the same
+    user between flushes collapses into one row update, and all pending rows
+    are written with a single bulk UPDATE.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.flushed_rows = 0
+
+    def record(self, user_id: str, at: Optional[datetime] = None, login: bool = False):
+        at = at or datetime.utcnow()
+        with self._lock:
+            entry = self._pending.setdefault(user_id, {"id": user_id})
+            entry["last_activity"] = at
+            if login:
+                entry["last_login"] = at
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all pending timestamps; returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        # Rows with and without last_login are sent as separate executemany batches
+        with_login = [row for row in pending.values() if "last_login" in row]
+        activity_only = [row for row in pending.values() if "last_login" not in row]
+
+        db = SessionLocal()
+        try:
+            for rows in (with_login, activity_only):
+                if rows:
+                    db.execute(update(User), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to flush user activity: {str(e)}")
+            # Keep the timestamps for the next attempt unless newer ones arrived
+            with self._lock:
+                for user_id, row in pending.items():
+                    self._pending.setdefault(user_id, row)
+            return 0
+        finally:
+            db.close()
+
+        self.flushed_rows += len(pending)
+        return len(pending)
+
+
+activity_buffer = ActivityBuffer()
+_flusher: Optional[asyncio.Task] = None
+
+def record_activity(user_id: str):
+    activity_buffer.record(user_id)
+
+def record_login(user_id: str):
+    activity_buffer.record(user_id, login=True)
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(settings.ACTIVITY_FLUSH_SECONDS)
+        await asyncio.to_thread(activity_buffer.flush)
+
+def start_activity_flusher():
+    """Start the periodic flush task on the running event loop"""
+    global _flusher
+    if _flusher is None or _flusher.done():
+        _flusher = asyncio.create_task(_flush_loop())
+
+async def stop_activity_flusher():
+    """Stop the periodic task and write out whatever is still buffered"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        _flusher = None
+    flushed = await asyncio.to_thread(activity_buffer.flush)
+    logger.info(f"Flushed activity of {flushed} users on shutdown")
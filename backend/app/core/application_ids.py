@@ -0,0 +1,138 @@
+"""
+Application reference numbers: LB-YYYY-NNNNNNNN-C.
+
+Each year has a counter in the id_sequences table. Processes reserve
+APPLICATION_ID_BLOCK_SIZE values at a time with one UPDATE, so IDs are
+unique across workers without a database round-trip per ID (unused values
+of a block are skipped when a process exits). The counter is turned into
+the 8-digit number by a keyed Feistel permutation, a bijection on
+0..99,999,999, so numbers do not reveal submission order or volume and
+neighbouring IDs cannot be guessed without APPLICATION_ID_SCRAMBLE_KEY
+(a required secret outside DEBUG). C is a Damm check digit over year and
+number, which catches every single-digit typo and swap of adjacent digits.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.database import engine
+from app.models.application import IdSequence
+from app.config import settings
+import hashlib
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_ID_PATTERN = re.compile(r"LB-(\d{4})-(\d{8})-(\d)")
+HALF = 10_000  # the 8-digit number is two 4-digit Feistel halves
+NUMBER_SPACE = HALF * HALF
+FEISTEL_ROUNDS = 4
+
+# Damm algorithm quasigroup (weakly totally anti-symmetric)
+DAMM_TABLE = (
+    (0, 3, 1, 7, 5, 9, 8, 6, 4, 2),
+    (7, 0, 9, 2, 1, 5, 4, 8, 6, 3),
+    (4, 2, 0, 6, 8, 7, 1, 3, 5, 9),
+    (1, 7, 5, 0, 9, 8, 3, 4, 2, 6),
+    (6, 1, 2, 3, 0, 4, 5, 9, 7, 8),
+    (3, 6, 7, 4, 2, 0, 9, 5, 8, 1),
+    (5, 8, 6, 9, 7, 2, 0, 1, 3, 4),
+    (8, 9, 4, 5, 3, 6, 2, 0, 1, 7),
+    (9, 4, 3, 8, 6, 1, 7, 2, 0, 5),
+    (2, 5, 8, 1, 4, 3, 6, 7, 9, 0),
+)
+
+
+def damm_check_digit(digits: str) -> int:
+    interim = 0
+    for digit in digits:
+        interim = DAMM_TABLE[interim][int(digit)]
+    return interim
+
+def _round_value(key: bytes, round_index: int, half: int) -> int:
+    digest = hashlib.blake2b(f"{round_index}:{half}".encode(), key=key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % HALF
+
+def scramble(counter: int, key: bytes) -> int:
+    """Keyed permutation of 0..NUMBER_SPACE-1"""
+    left, right = divmod(counter, HALF)
+    for round_index in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round_value(key, round_index, right)) % HALF
+    return left * HALF + right
+
+def unscramble(number: int, key: bytes) -> int:
+    left, right = divmod(number, HALF)
+    for round_index in reversed(range(FEISTEL_ROUNDS)):
+        left, right = (right - _round_value(key, round_index, left)) % HALF, left
+    return left * HALF + right
+
+def format_application_id(year: int, counter: int, key: bytes) -> str:
+    number = f"{scramble(counter, key):08d}"
+    return f"LB-{year}-{number}-{damm_check_digit(f'{year}{number}')}"
+
+def is_valid_application_id(application_id: str) -> bool:
+    """Current format with a correct check digit"""
+    match = APPLICATION_ID_PATTERN.fullmatch(application_id)
+    return match is not None and damm_check_digit(match.group(1) + match.group(2) + match.group(3)) == 0
+
+
+class ApplicationIdGenerator:
+    """Hands out IDs from blocks of the yearly counter reserved in the database"""
+
+    def __init__(self, block_size: int, key: str):
+        self.block_size = block_size
+        self.key = key.encode()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the current block (a forked child must not reuse its parent's)"""
+        self._year: Optional[int] = None
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self, year: int):
+        name = f"application-{year}"
+        table = IdSequence.__table__
+        for _ in range(3):
+            try:
+                # The UPDATE locks the row until commit, so the value read back is ours
+                with engine.begin() as conn:
+                    updated = conn.execute(
+                        table.update()
+                        .where(table.c.name == name)
+                        .values(next_value=table.c.next_value + self.block_size)
+                    ).rowcount
+                    if not updated:
+                        conn.execute(table.insert().values(name=name, next_value=self.block_size))
+                    end = conn.execute(select(table.c.next_value).where(table.c.name == name)).scalar_one()
+                break
+            except IntegrityError:
+                # Another process created this year's row first
+                continue
+        else:
+            raise RuntimeError(f"Could not reserve application IDs for {year}")
+
+        if end > NUMBER_SPACE:
+            raise RuntimeError(f"Application ID space for {year} is exhausted")
+        self._year, self._next, self._end = year, end - self.block_size, end
+        logger.info(f"Reserved application IDs {self._next}-{end - 1} of {year}")
+
+    def generate(self) -> str:
+        year = datetime.now().year
+        with self._lock:
+            if year != self._year or self._next >= self._end:
+                self._reserve_block(year)
+            counter = self._next
+            self._next += 1
+        return format_application_id(year, counter, self.key)
+
+
+application_ids = ApplicationIdGenerator(settings.APPLICATION_ID_BLOCK_SIZE, settings.APPLICATION_ID_SCRAMBLE_KEY)
+os.register_at_fork(after_in_child=application_ids.reset)
+
+def generate_application_id() -> str:
+    return application_ids.generate()
@@ -0,0 +1,356 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.core.redis_client import dumps_signed, get_redis_client, loads_signed
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Lookups are a dictionary access plus a clock read; the least recently
+    used entry is evicted once `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind a `Cache` namespace.
+
+    Keys arrive fully qualified. Backends must be safe to share between
+    threads; failures of a remote store should read as misses rather than
+    errors so callers fall back to the database. Backends doing network
+    I/O set `blocking` so async callers run them in the thread pool.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Return the stored value or _MISSING"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def invalidate_tag(self, tag: str):
+        ...
+
+    @abstractmethod
+    def lock(self, key: str, timeout: float):
+        """Context manager held while one caller recomputes `key`"""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process storage: a TTLCache plus tag index and striped locks"""
+
+    def __init__(self, max_size: int):
+        self._store = TTLCache(max_size=max_size)
+        self._tags: Dict[str, Set[str]] = {}
+        self._tags_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def get(self, key: str) -> Any:
+        return self._store.get(key, _MISSING)
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        self._store.set(key, value, ttl)
+        if tags:
+            with self._tags_lock:
+                for tag in tags:
+                    keys = self._tags.setdefault(tag, set())
+                    keys.add(key)
+                    if len(keys) > 2 * self._store.max_size:
+                        keys.intersection_update(self._store._entries.keys())
+
+    def delete(self, key: str):
+        self._store.delete(key)
+
+    def invalidate_tag(self, tag: str):
+        with self._tags_lock:
+            keys = self._tags.pop(tag, ())
+        for key in keys:
+            self._store.delete(key)
+
+    @contextmanager
+    def lock(self, key: str, timeout: float):
+        lock = self._locks[hash(key) % len(self._locks)]
+        acquired = lock.acquire(timeout=timeout)
+        try:
+            yield
+        finally:
+            if acquired:
+                lock.release()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._store.stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Storage shared by all workers. Values are pickled and signed (see
+    app.core.redis_client); tags are Redis sets of member keys; locks use
+    redis-py's SET NX based Lock. After an error the backend reads as empty
+    for a second instead of waiting on a socket timeout in every request.
+    """
+
+    blocking = True
+
+    def __init__(self, client):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._down_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def get(self, key: str) -> Any:
+        if not self._available():
+            return _MISSING
+        try:
+            raw = self.client.get(key)
+        except Exception as e:
+            return self._failed("get", e)
+        if raw is None:
+            self.misses += 1
+            return _MISSING
+        try:
+            value = loads_signed(raw)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        if ttl <= 0 or not self._available():
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(key, dumps_signed(value), px=int(ttl * 1000))
+            for tag in tags:
+                pipe.sadd(f"tag:{tag}", key)
+                pipe.pexpire(f"tag:{tag}", int(ttl * 1000))
+            pipe.execute()
+        except Exception as e:
+            self._failed("set", e)
+
+    def delete(self, key: str):
+        # Invalidations are always attempted
+        try:
+            self.client.delete(key)
+        except Exception as e:
+            self._failed("delete", e)
+
+    def invalidate_tag(self, tag: str):
+        try:
+            keys = self.client.smembers(f"tag:{tag}")
+            self.client.delete(f"tag:{tag}", *keys)
+        except Exception as e:
+            self._failed("invalidate", e)
+
+    @contextmanager
+    def lock(self, key: str, timeout: float):
+        lock = self.client.lock(f"lock:{key}", timeout=timeout, sleep=0.05, blocking_timeout=timeout)
+        acquired = False
+        if self._available():
+            try:
+                acquired = lock.acquire()
+            except Exception as e:
+                self._failed("lock", e)
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception:
+                    pass  # expired while we computed; someone else may hold it now
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        self._down_until = time.monotonic() + 1.0
+        logger.warning(f"Redis cache {operation} failed: {str(error)}")
+        return _MISSING
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class Cache:
+    """
+    Namespaced cache with a default TTL, tag invalidation and single-flight
+    loading. The backend is chosen by settings.CACHE_BACKEND ("memory" or
+    "redis"); with Redis, entries and invalidations are shared by all
+    workers.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend, ttl: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, key: Hashable) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{tag}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.backend.get(self._key(key))
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl > 0:
+            self.backend.set(self._key(key), value, ttl, [self._tag(tag) for tag in tags])
+
+    def delete(self, key: Hashable):
+        self.backend.delete(self._key(key))
+
+    def invalidate_tag(self, tag: str):
+        self.backend.invalidate_tag(self._tag(tag))
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        Return the cached value or compute it with `loader`. Concurrent misses
+        on the same key wait for the first caller instead of all hitting the
+        database (across workers with Redis).
+        """
+        value = self.backend.get(self._key(key))
+        if value is not _MISSING:
+            return value
+        with self.backend.lock(self._key(key), settings.CACHE_LOCK_TIMEOUT_SECONDS):
+            value = self.backend.get(self._key(key))
+            if value is _MISSING:
+                value = loader()
+                self.set(key, value, ttl, tags)
+        return value
+
+    # Async variants for routes: a blocking backend runs in the thread pool
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, key, default)
+        return self.get(key, default)
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        if self.backend.blocking:
+            await run_in_threadpool(self.set, key, value, ttl, tags)
+        else:
+            self.set(key, value, ttl, tags)
+
+    async def adelete(self, key: Hashable):
+        if self.backend.blocking:
+            await run_in_threadpool(self.delete, key)
+        else:
+            self.delete(key)
+
+    async def ainvalidate_tag(self, tag: str):
+        if self.backend.blocking:
+            await run_in_threadpool(self.invalidate_tag, tag)
+        else:
+            self.invalidate_tag(tag)
+
+    async def aget_or_set(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """get_or_set whose miss path (lock wait and loader) runs in the thread pool"""
+        value = await self.aget(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return await run_in_threadpool(self.get_or_set, key, loader, ttl, tags)
+
+    def stats(self) -> dict:
+        return {"namespace": self.namespace, **self.backend.stats()}
+
+
+def create_cache(namespace: str, ttl: float, max_size: int = 1024) -> Cache:
+    """Cache namespace on the configured backend (`max_size` applies in memory only)"""
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(get_redis_client())
+    elif settings.CACHE_BACKEND == "memory":
+        backend = InMemoryCacheBackend(max_size)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
+    return Cache(namespace, backend, ttl)
@@ -0,0 +1,54 @@
+from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
+from app.config import settings
+
+# I/O-bound tasks (SMTP, network) and CPU-bound tasks (parsing, rendering,
+# image work) are routed to separate queues so they can be served by
+# differently sized worker pools:
+#
+#   celery -A app.core.celery worker -Q io --pool=threads --concurrency=32
+#   celery -A app.core.celery worker -Q cpu --pool=prefork --concurrency=<cores>
+IO_QUEUE = "io"
+CPU_QUEUE = "cpu"
+
+celery_app = Celery(
+    "leipzig_buergerbuero",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.tasks.notifications",
+        "app.tasks.imports",
+        "app.tasks.exports",
+        "app.tasks.previews",
+    ],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="Europe/Berlin",
+    # Eager mode runs tasks inline in the caller (local development, tests)
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+    task_queues=[Queue(IO_QUEUE), Queue(CPU_QUEUE)],
+    task_default_queue=IO_QUEUE,
+    task_routes={
+        "app.tasks.notifications.*": {"queue": IO_QUEUE},
+        "app.tasks.imports.*": {"queue": CPU_QUEUE},
+        "app.tasks.exports.*": {"queue": CPU_QUEUE},
+        "app.tasks.previews.*": {"queue": CPU_QUEUE},
+    },
+    # Long CPU tasks should not sit prefetched behind another one
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    result_expires=24 * 3600,
+    beat_schedule={
+        "daily-staff-summaries": {
+            "task": "app.tasks.notifications.send_daily_summaries_task",
+            "schedule": crontab(hour=settings.DAILY_SUMMARY_HOUR, minute=0),
+        },
+    },
+)
@@ -0,0 +1,15 @@
+from app.core.cache import create_cache
+from app.config import settings
+
+# Dashboard summaries keyed by scope ("all" or a case worker's user id)
+dashboard_cache = create_cache("dashboard", ttl=settings.DASHBOARD_CACHE_TTL_SECONDS, max_size=1024)
+
+DASHBOARD_TAG = "summaries"
+
+async def cached_dashboard_summary(scope: str, loader) -> dict:
+    """Cached summary for a scope; concurrent misses compute it once"""
+    return await dashboard_cache.aget_or_set(scope, loader, tags=[DASHBOARD_TAG])
+
+async def invalidate_dashboards():
+    """Drop every cached summary (any change to an application's status or assignment)"""
+    await dashboard_cache.ainvalidate_tag(DASHBOARD_TAG)
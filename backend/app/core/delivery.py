@@ -0,0 +1,370 @@
+from app.utils.email import build_email_message, deliver_message
+from app.core.metrics import EMAIL_DELIVERIES
+from app.config import settings
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+if TYPE_CHECKING:
+    from email.mime.multipart import MIMEMultipart
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the SMTP relay.
+
+    After `failure_threshold` consecutive transient failures the breaker opens
+    and no delivery is attempted for `reset_timeout` seconds. It then lets a
+    single probe through (half-open); success closes it, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if a delivery attempt may be made now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            logger.info("SMTP circuit breaker half-open, probing relay")
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def seconds_until_retry(self) -> float:
+        """Time until the breaker allows the next probe"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> bool:
+        """Record a successful delivery; returns True if the breaker just closed"""
+        recovered = self.state != self.CLOSED
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if recovered:
+            logger.info("SMTP circuit breaker closed, relay recovered")
+        return recovered
+
+    def record_failure(self):
+        """Record a transient delivery failure"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"SMTP circuit breaker opened after {self.consecutive_failures} failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """Token bucket enforcing the global sends-per-second budget"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def drain(self):
+        """Drop saved-up burst capacity so a backlog is sent at the steady rate"""
+        self.tokens = 0.0
+        self.updated_at = time.monotonic()
+
+
+@dataclass
+class EmailJob:
+    """Message queued for delivery"""
+    message: "MIMEMultipart"
+    to_email: str
+    attempts: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    last_error: Optional[str] = None
+
+
+def is_permanent_failure(exc: Exception) -> bool:
+    """SMTP 5xx replies (e.g. unknown recipient) will not succeed on retry"""
+    # aiosmtplib exceptions carry `code`, smtplib ones `smtp_code`
+    code = getattr(exc, "code", getattr(exc, "smtp_code", None))
+    recipients = getattr(exc, "recipients", None)
+    if code is None and recipients:
+        # SMTPRecipientsRefused: every recipient was rejected, permanent if all
+        # refusals were (smtplib: {address: (code, text)}, aiosmtplib: [exceptions])
+        if isinstance(recipients, dict):
+            codes = [reply[0] for reply in recipients.values()]
+        else:
+            codes = [getattr(refusal, "code", None) for refusal in recipients]
+        return all(isinstance(c, int) and 500 <= c < 600 for c in codes)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+class DeliveryScheduler:
+    """
+    Rate-limited email delivery with retries and a circuit breaker.
+
+    Jobs are sent at no more than `rate` messages per second. Transient
+    failures are retried with exponential backoff and jitter up to
+    `max_attempts`; permanent failures and exhausted jobs go to the
+    dead-letter queue.
+    """
+
+    def __init__(
+        self,
+        send_func: Callable[["MIMEMultipart"], Awaitable[None]] = deliver_message,
+        rate: float = 5.0,
+        burst: int = 10,
+        max_attempts: int = 6,
+        backoff_base: float = 2.0,
+        backoff_max: float = 600.0,
+        max_concurrency: int = 4,
+        breaker: Optional[CircuitBreaker] = None,
+        dead_letter_size: int = 1000
+    ):
+        self.send_func = send_func
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(5, 30.0)
+        self.dead_letters: Deque[EmailJob] = deque(maxlen=dead_letter_size)
+
+        self._ready: Deque[EmailJob] = deque()
+        self._delayed: List = []  # heap of (due_at, seq, job)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.sent_count = 0
+        self.retry_count = 0
+
+    def submit(self, message: "MIMEMultipart") -> EmailJob:
+        """Queue a message for delivery and make sure the worker is running"""
+        job = EmailJob(message=message, to_email=message["To"])
+        self._ready.append(job)
+        self._wakeup.set()
+        self.start()
+        return job
+
+    def start(self):
+        """Start the delivery worker on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, drain: bool = True, timeout: float = 10.0):
+        """Stop the worker, optionally trying to deliver queued mail (and due retries) first"""
+        if drain and self._worker is not None:
+            deadline = time.monotonic() + timeout
+            while self._ready or self._delayed or self._in_flight:
+                if time.monotonic() >= deadline:
+                    break
+                if not self._ready and not self._in_flight and self._delayed[0][0] > deadline:
+                    # The next retry is not due before the deadline; waiting cannot help
+                    break
+                await asyncio.sleep(0.05)
+
+        self._stopping = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = len(self._ready) + len(self._delayed)
+        if pending:
+            logger.warning(f"Email scheduler stopped with {pending} undelivered messages")
+
+    def stats(self) -> dict:
+        """Queue and breaker state for monitoring"""
+        return {
+            "queued": len(self._ready),
+            "scheduled_retries": len(self._delayed),
+            "in_flight": len(self._in_flight),
+            "sent": self.sent_count,
+            "retries": self.retry_count,
+            "dead_letters": len(self.dead_letters),
+            "breaker_state": self.breaker.state,
+        }
+
+    def _promote_due_jobs(self):
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job = heapq.heappop(self._delayed)
+            self._ready.append(job)
+
+    def _next_wait(self) -> Optional[float]:
+        if self._ready:
+            return self.breaker.seconds_until_retry() or None
+        if self._delayed:
+            return max(0.0, self._delayed[0][0] - time.monotonic())
+        return None
+
+    async def _run(self):
+        while not self._stopping:
+            self._promote_due_jobs()
+
+            if not self._ready or not self.breaker.allow_request():
+                self._wakeup.clear()
+                wait = self._next_wait()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait if wait else None)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = self._ready.popleft()
+            await self.bucket.acquire()
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._attempt(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _attempt(self, job: EmailJob):
+        try:
+            job.attempts += 1
+            await self.send_func(job.message)
+        except Exception as e:
+            job.last_error = str(e)
+            if is_permanent_failure(e):
+                # The relay answered, so it is healthy; only this message is bad
+                self.breaker.record_success()
+                self._dead_letter(job)
+            else:
+                self.breaker.record_failure()
+                self._schedule_retry(job)
+        else:
+            self.sent_count += 1
+            EMAIL_DELIVERIES.labels("sent").inc()
+            if self.breaker.record_success():
+                # Relay is back: send the backlog at the steady rate, not in a burst
+                self.bucket.drain()
+            logger.info(f"Email delivered to {job.to_email} (attempt {job.attempts})")
+        finally:
+            self._semaphore.release()
+            self._wakeup.set()
+
+    def _schedule_retry(self, job: EmailJob):
+        if job.attempts >= self.max_attempts:
+            self._dead_letter(job)
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (job.attempts - 1)))
+        delay = random.uniform(delay / 2, delay)
+        self.retry_count += 1
+        EMAIL_DELIVERIES.labels("retried").inc()
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), job))
+        logger.warning(
+            f"Email to {job.to_email} failed (attempt {job.attempts}): {job.last_error}; "
+            f"retrying in {delay:.1f}s"
+        )
+
+    def _dead_letter(self, job: EmailJob):
+        self.dead_letters.append(job)
+        EMAIL_DELIVERIES.labels("dead_lettered").inc()
+        logger.error(
+            f"Email to {job.to_email} moved to dead-letter queue after "
+            f"{job.attempts} attempts: {job.last_error}"
+        )
+
+
+_scheduler: Optional[DeliveryScheduler] = None
+
+def get_delivery_scheduler() -> DeliveryScheduler:
+    """Process-wide delivery scheduler configured from settings"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DeliveryScheduler(
+            rate=settings.EMAIL_RATE_PER_SECOND,
+            burst=settings.EMAIL_BURST,
+            max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+            backoff_base=settings.EMAIL_RETRY_BASE_SECONDS,
+            backoff_max=settings.EMAIL_RETRY_MAX_SECONDS,
+            max_concurrency=settings.EMAIL_MAX_CONCURRENCY,
+            breaker=CircuitBreaker(
+                settings.EMAIL_BREAKER_FAILURE_THRESHOLD,
+                settings.EMAIL_BREAKER_RESET_SECONDS
+            )
+        )
+    return _scheduler
+
+async def queue_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+    is_html: bool = False,
+    attachments: Optional[List[str]] = None
+) -> bool:
+    """Queue an email for rate-limited delivery with retries"""
+    # An eager task would run inline and block the request's event loop on
+    # SMTP, so eager mode (development, tests) uses the in-process scheduler
+    if settings.EMAIL_DELIVERY == "celery" and not settings.CELERY_TASK_ALWAYS_EAGER:
+        from app.tasks.notifications import send_email_task
+        try:
+            send_email_task.delay(to_email, subject, body, from_email, from_name, is_html, attachments)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to enqueue email to {to_email}: {str(e)}")
+            return False
+    
+    try:
+        message = build_email_message(
+            to_email, subject, body, from_email, from_name, is_html, attachments
+        )
+        get_delivery_scheduler().submit(message)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue email to {to_email}: {str(e)}")
+        return False
+
+async def shutdown_delivery_scheduler(timeout: float = 10.0):
+    """Drain and stop the delivery scheduler"""
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop(drain=True, timeout=timeout)
+        # Its event and semaphore belong to this event loop; the next loop
+        # (another asyncio.run in a Celery worker or cron job) gets a new one
+        _scheduler = None
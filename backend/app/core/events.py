@@ -0,0 +1,207 @@
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Type
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import asyncio
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Domain events of the application lifecycle
+
+@dataclass
+class ApplicationSubmitted:
+    application_id: str
+    email: str
+    language: str = "de"
+    notify: bool = True
+
+@dataclass
+class StatusChanged:
+    application_id: str
+    old_status: object
+    new_status: object
+    message: Optional[str]
+    email: str
+    language: str = "de"
+    case_worker_id: Optional[str] = None
+    notify: bool = True
+
+@dataclass
+class Assigned:
+    application_id: str
+    status: object
+    old_worker_id: Optional[str]
+    new_worker_id: str
+    message: str
+    # Set when the assignment moved the application on (EINGEGANGEN -> IN_BEARBEITUNG)
+    old_status: object = None
+    email: Optional[str] = None
+    language: str = "de"
+
+@dataclass
+class DocumentUploaded:
+    application_id: str
+    filename: str
+    size: int = 0
+
+
+InTransactionHandler = Callable[[Session, List[object]], None]
+AfterCommitHandler = Callable[[List[object]], Awaitable[None]]
+
+
+class EventBus:
+    """
+    In-process dispatcher for domain events.
+
+    Events published on a session are buffered until it commits, then
+    delivered per type as one batch, so a bulk operation touching N
+    applications costs each subscriber one call:
+
+    - in-transaction handlers run synchronously inside the commit (before
+      the final flush) and can add rows that commit atomically with it;
+    - after-commit handlers are coroutines scheduled once the commit
+      succeeded. A rollback discards the buffered events.
+
+    Commits made outside any event loop (Celery workers, scripts) hand
+    their after-commit handlers to a long-lived loop on a background
+    thread, so the committing thread does not wait for them and tasks the
+    handlers leave behind (e.g. coalesced flushes) keep running.
+    """
+
+    def __init__(self):
+        self._in_transaction: Dict[Type, List[InTransactionHandler]] = {}
+        self._after_commit: Dict[Type, List[AfterCommitHandler]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_lock = threading.Lock()
+        self._futures: Set[Future] = set()
+
+    def subscribe(self, event_type: Type, handler, after_commit: bool = False):
+        registry = self._after_commit if after_commit else self._in_transaction
+        registry.setdefault(event_type, []).append(handler)
+
+    def in_transaction(self, *event_types: Type):
+        """Decorator registering a sync handler run inside the committing transaction"""
+        def decorator(handler: InTransactionHandler):
+            for event_type in event_types:
+                self.subscribe(event_type, handler)
+            return handler
+        return decorator
+
+    def after_commit(self, *event_types: Type):
+        """Decorator registering an async handler run after a successful commit"""
+        def decorator(handler: AfterCommitHandler):
+            for event_type in event_types:
+                self.subscribe(event_type, handler, after_commit=True)
+            return handler
+        return decorator
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop for after-commit handlers of commits made in worker threads"""
+        self._loop = loop
+
+    def publish(self, db: Session, *events):
+        """Buffer events on the session until its transaction commits"""
+        if not db.in_transaction():
+            db.begin()  # so a rollback before any SQL still discards the events
+        db.info.setdefault("pending_events", []).extend(events)
+
+    def _run_in_transaction(self, db: Session):
+        committed = db.info.setdefault("committed_events", [])
+        # Handlers may publish follow-up events; drain until quiet
+        while db.info.get("pending_events"):
+            pending = db.info.pop("pending_events")
+            for event_type, batch in _group_by_type(pending).items():
+                for handler in self._in_transaction.get(event_type, ()):
+                    handler(db, batch)
+            committed.extend(pending)
+
+    def _dispatch_after_commit(self, db: Session):
+        committed = db.info.pop("committed_events", None)
+        if not committed:
+            return
+        for event_type, batch in _group_by_type(committed).items():
+            for handler in self._after_commit.get(event_type, ()):
+                self._schedule(handler, batch)
+
+    def _schedule(self, handler: AfterCommitHandler, batch: List[object]):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            task = loop.create_task(self._run_handler(handler, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            if self._loop is not None and self._loop.is_running():
+                target = self._loop
+            else:
+                # Workers and scripts without an event loop
+                target = self._background_loop()
+            future = asyncio.run_coroutine_threadsafe(self._run_handler(handler, batch), target)
+            self._futures.add(future)
+            future.add_done_callback(self._futures.discard)
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._worker_lock:
+            if self._worker_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="event-bus", daemon=True).start()
+                self._worker_loop = loop
+            return self._worker_loop
+
+    async def _run_handler(self, handler: AfterCommitHandler, batch: List[object]):
+        try:
+            await handler(batch)
+        except Exception as e:
+            logger.error(f"Event handler {handler.__name__} failed for {len(batch)} events: {str(e)}")
+
+    def _discard(self, db: Session):
+        db.info.pop("pending_events", None)
+        db.info.pop("committed_events", None)
+
+    async def drain(self):
+        """Wait for after-commit handlers still running (on shutdown)"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def wait_background(self, timeout: float = 10.0):
+        """Block until handlers handed to other loops have finished"""
+        if self._futures:
+            wait(list(self._futures), timeout=timeout)
+
+
+def _group_by_type(events: List[object]) -> Dict[Type, List[object]]:
+    grouped: Dict[Type, List[object]] = {}
+    for item in events:
+        grouped.setdefault(type(item), []).append(item)
+    return grouped
+
+
+event_bus = EventBus()
+# Let a script's last commit finish its notifications before the interpreter exits
+atexit.register(event_bus.wait_background)
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    event_bus._run_in_transaction(session)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    event_bus._dispatch_after_commit(session)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_soft_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        event_bus._discard(session)
+
+def publish(db: Session, *events):
+    event_bus.publish(db, *events)
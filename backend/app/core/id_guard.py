@@ -0,0 +1,256 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from typing import Iterable, List, Optional
+from app.database import SessionLocal
+from app.models.application import Application
+from app.core.rate_limit import TokenBucketLimiter, get_rate_limit_backend, raise_too_many_requests
+from app.core.application_ids import is_valid_application_id
+from app.core.redis_client import get_redis_client
+from app.utils.helpers import get_client_ip
+from app.config import settings
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Formats issued before app.core.application_ids
+LEGACY_APPLICATION_ID_PATTERNS = [
+    re.compile(r"LB-\d{4}-\d{6}"),
+    re.compile(r"APP-[0-9A-F]{8}"),
+]
+
+def is_valid_application_id_format(application_id: str) -> bool:
+    """Current IDs must carry a correct check digit, so typos never reach the database"""
+    return is_valid_application_id(application_id) or \
+        any(pattern.fullmatch(application_id) for pattern in LEGACY_APPLICATION_ID_PATTERNS)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, ~error_rate false positives)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class ApplicationIdFilter:
+    """
+    In-memory membership filter over applications.id, consulted before every
+    public lookup by ID. Its negative answer is final: the lookup gets a 404
+    without a query, so made-up IDs never reach the database.
+
+    It is built from the table in a background thread at startup and kept
+    current by inserts. With ID_FILTER_BACKEND="redis" each process
+    announces the IDs it commits on a Redis channel and adds the ones the
+    others announce (API workers, Celery imports); with "memory" it only
+    knows its own (run a single worker). A full rebuild every
+    BLOOM_REBUILD_SECONDS, and after Redis was unreachable, picks up rows
+    written outside the application and missed announcements. Once more IDs
+    were added than the filter was sized for, a replacement is built in the
+    background while the current one keeps serving.
+    """
+
+    def __init__(self, backend: str = "memory", client=None):
+        if backend not in ("memory", "redis"):
+            raise ValueError(f"Unknown ID_FILTER_BACKEND: {backend}")
+        self.backend = backend
+        self.channel = f"{settings.CACHE_KEY_PREFIX}:application-ids"
+        self._client = client
+        self._origin = uuid.uuid4().hex  # to skip our own announcements
+        self._filter: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._pending: List[str] = []  # added while a rebuild scans the table
+        self._stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+
+    def rebuild(self, db: Optional[Session] = None):
+        """Build a fresh filter from every application ID (a full scan; run off the request path)"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            total = db.query(Application.id).count()
+            bloom = BloomFilter(
+                max(settings.BLOOM_MIN_CAPACITY, total * 2),
+                settings.BLOOM_ERROR_RATE
+            )
+            for (application_id,) in db.query(Application.id).yield_per(10000):
+                bloom.add(application_id)
+        finally:
+            if own_session:
+                db.close()
+
+        with self._lock:
+            # Keep IDs added while the scan was running
+            for application_id in self._pending:
+                bloom.add(application_id)
+            self._pending = []
+            self._filter = bloom
+        logger.info(f"Application ID filter built with {bloom.count} IDs ({len(bloom.bits)} bytes)")
+
+    def rebuild_in_background(self):
+        """Start a rebuild on a daemon thread unless one is already running"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._background_rebuild, name="id-filter-rebuild", daemon=True).start()
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            # Lookups keep using the current filter (or the route's query until the first build)
+            logger.error(f"Failed to build application ID filter: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def add(self, application_id: str):
+        self.add_many([application_id])
+
+    def add_many(self, application_ids: Iterable[str]):
+        """Add IDs to this process's filter"""
+        application_ids = list(application_ids)
+        with self._lock:
+            if self._rebuilding:
+                self._pending.extend(application_ids)
+            if self._filter is None:
+                return
+            for application_id in application_ids:
+                self._filter.add(application_id)
+            overfull = self._filter.count > self._filter.capacity
+        if overfull:
+            self.rebuild_in_background()
+
+    def register(self, application_ids: Iterable[str]):
+        """Add newly committed IDs here and announce them to the other processes (blocking)"""
+        application_ids = list(application_ids)
+        self.add_many(application_ids)
+        if self.backend == "redis":
+            message = json.dumps({"origin": self._origin, "ids": application_ids})
+            try:
+                self.client.publish(self.channel, message)
+            except Exception as e:
+                # The other workers pick the IDs up with their next rebuild
+                logger.warning(f"Application IDs could not be announced: {str(e)}")
+
+    def might_exist(self, application_id: str) -> bool:
+        """False means the ID does not exist; True until the first build has finished"""
+        bloom = self._filter
+        return bloom is None or application_id in bloom
+
+    def start(self):
+        """Build the filter and keep it current (call in every worker process)"""
+        if self._sync_thread is not None:
+            return
+        self._stop.clear()
+        self._sync_thread = threading.Thread(target=self._sync, name="id-filter-sync", daemon=True)
+        self._sync_thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        if self._sync_thread is not None:
+            self._stop.set()
+            self._sync_thread.join(timeout)
+            self._sync_thread = None
+
+    def _sync(self):
+        pubsub = None
+        rebuild_due = 0.0  # right away
+        while not self._stop.is_set():
+            if time.monotonic() >= rebuild_due:
+                self.rebuild_in_background()
+                rebuild_due = time.monotonic() + (settings.BLOOM_REBUILD_SECONDS or math.inf)
+            if self.backend == "memory":
+                self._stop.wait(1.0)
+                continue
+            try:
+                if pubsub is None:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.channel)
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    self._apply_announcement(message["data"])
+            except Exception as e:
+                logger.warning(f"Application ID listener lost Redis: {str(e)}; reconnecting")
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+                    pubsub = None
+                # Announcements were missed meanwhile; rebuild once resubscribed
+                rebuild_due = 0.0
+                self._stop.wait(1.0)
+        if pubsub is not None:
+            pubsub.close()
+
+    def _apply_announcement(self, raw):
+        try:
+            message = json.loads(raw)
+            if message["origin"] != self._origin:
+                self.add_many(message["ids"])
+        except Exception as e:
+            logger.warning(f"Ignoring malformed application ID announcement: {str(e)}")
+
+
+application_id_filter = ApplicationIdFilter(settings.ID_FILTER_BACKEND)
+
+lookup_ip_limiter = TokenBucketLimiter(
+    "lookup-ip", settings.LOOKUP_RATE_PER_MINUTE_IP, settings.LOOKUP_BURST_IP
+)
+
+async def guard_application_lookup(request: Request, application_id: str):
+    """
+    Cheap checks before a public lookup by application ID: per-IP rate
+    limit, ID format and membership filter. Garbage IDs get the same 404
+    as a failed lookup without reaching the route's query.
+    """
+    client_ip = get_client_ip(request)
+    if get_rate_limit_backend().blocking:
+        allowed, retry_after = await run_in_threadpool(lookup_ip_limiter.hit, client_ip)
+    else:
+        allowed, retry_after = lookup_ip_limiter.hit(client_ip)
+    if not allowed:
+        raise_too_many_requests(retry_after)
+
+    if not is_valid_application_id_format(application_id) or not application_id_filter.might_exist(application_id):
+        raise HTTPException(
+            status_code=404,
+            detail="Application not found or invalid credentials"
+        )
@@ -0,0 +1,165 @@
+"""
+Event loop lag monitor.
+
+Routes are `async def` but run synchronous database and bcrypt work on the
+loop thread, which stalls every other request without showing up anywhere.
+A task sleeps LOOP_LAG_INTERVAL_SECONDS at a time and records how late it
+wakes up (event_loop_lag_seconds, plus rolling p50/p95/p99 gauges). A
+watchdog thread notices when that task has not run for longer than
+LOOP_LAG_THRESHOLD_SECONDS, captures the loop thread's stack while it is
+still blocked and reports the route and the function that block it.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+from fastapi.routing import APIRoute
+from app.config import settings
+from app.core.metrics import LOOP_LAG, LOOP_LAG_QUANTILES, LOOP_STALLS
+from app.core.profiling import frame_name, stack_names
+import asyncio
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+APP_PACKAGE = "app."
+
+
+@dataclass
+class Stall:
+    """A loop stall caught by the watchdog while it was happening"""
+    detected_at: datetime
+    route: Optional[str]
+    function: str
+    call_site: Optional[str]
+    stack: List[str] = field(default_factory=list)
+    lag_seconds: Optional[float] = None  # filled in once the loop is back
+
+
+def endpoint_routes(app) -> Dict[object, str]:
+    """Code object of every endpoint -> 'METHOD /path/{template}'"""
+    routes = {}
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            methods = ",".join(sorted(route.methods))
+            routes[route.endpoint.__code__] = f"{methods} {route.path_format}"
+    return routes
+
+
+class LoopMonitor:
+    def __init__(self):
+        self._routes: Dict[object, str] = {}
+        self._window: Deque[float] = deque(maxlen=settings.LOOP_LAG_WINDOW)
+        self._stalls: Deque[Stall] = deque(maxlen=50)
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = 0.0
+        self._current_stall: Optional[Stall] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self, app):
+        self._routes = endpoint_routes(app)
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started (interval {settings.LOOP_LAG_INTERVAL_SECONDS}s, "
+            f"threshold {settings.LOOP_LAG_THRESHOLD_SECONDS}s)"
+        )
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    def recent_stalls(self) -> List[Stall]:
+        return list(reversed(self._stalls))
+
+    def lag_quantiles(self) -> Dict[float, float]:
+        samples = sorted(self._window)
+        if not samples:
+            return {}
+        return {q: samples[min(int(q * len(samples)), len(samples) - 1)] for q in QUANTILES}
+
+    async def _measure(self):
+        interval = settings.LOOP_LAG_INTERVAL_SECONDS
+        ticks = 0
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            lag = max(now - expected, 0.0)
+            self._last_tick = now
+            LOOP_LAG.observe(lag)
+            self._window.append(lag)
+
+            stall = self._current_stall
+            if stall is not None:
+                self._current_stall = None
+                stall.lag_seconds = lag
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms by {stall.function} ({stall.route or 'no route'})")
+
+            ticks += 1
+            if ticks % 10 == 0:
+                for q, value in self.lag_quantiles().items():
+                    LOOP_LAG_QUANTILES.labels(str(q)).set(value)
+
+    def _watch(self):
+        threshold = settings.LOOP_LAG_THRESHOLD_SECONDS
+        allowed = settings.LOOP_LAG_INTERVAL_SECONDS + threshold
+        check_every = max(threshold / 4, 0.005)
+        reported_tick = None
+        while not self._stop.wait(check_every):
+            last_tick = self._last_tick
+            if last_tick == reported_tick or time.perf_counter() - last_tick < allowed:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported_tick = last_tick
+            stall = self._describe(frame)
+            self._current_stall = stall
+            self._stalls.append(stall)
+            LOOP_STALLS.labels(stall.route or "none").inc()
+            logger.warning(
+                f"Event loop stalled > {threshold * 1000:.0f} ms in {stall.function} "
+                f"(route: {stall.route or 'none'}, call site: {stall.call_site or 'unknown'})\n  "
+                + "\n  ".join(stall.stack[-15:])
+            )
+
+    def _describe(self, frame) -> Stall:
+        route = None
+        call_site = None
+        current = frame
+        # Innermost app frame up to the endpoint (middleware frames lie outside it)
+        while current is not None and route is None:
+            is_endpoint = current.f_code in self._routes
+            if call_site is None and (is_endpoint or current.f_globals.get("__name__", "").startswith(APP_PACKAGE)):
+                call_site = f"{frame_name(current)} line {current.f_lineno}"
+            if is_endpoint:
+                route = self._routes[current.f_code]
+            current = current.f_back
+        return Stall(
+            detected_at=datetime.utcnow(),
+            route=route,
+            function=frame_name(frame),
+            call_site=call_site,
+            stack=stack_names(frame),
+        )
+
+
+loop_monitor = LoopMonitor()
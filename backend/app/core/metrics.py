@@ -0,0 +1,116 @@
+"""
+Prometheus metrics.
+
+With PROMETHEUS_MULTIPROC_DIR set (app.server does this for gunicorn),
+every worker writes its samples to that directory and /metrics aggregates
+all workers; otherwise the process-local registry is served.
+"""
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from starlette.requests import Request
+from starlette.responses import Response
+import os
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code",
+    ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time until the response body was sent",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size",
+    ["method", "route"], buckets=SIZE_BUCKETS
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being served",
+    ["method"], multiprocess_mode="livesum"
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "bcrypt work per hash or verify call",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_wait_seconds", "Time queued for a hashing thread",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hashing requests rejected because the queue was full"
+)
+EMAIL_DELIVERIES = Counter(
+    "email_deliveries_total", "Email delivery attempts by outcome",
+    ["result"]
+)
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the loop monitor woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_LAG_QUANTILES = Gauge(
+    "event_loop_lag_quantile_seconds", "Event loop lag percentiles over the recent window (worst worker)",
+    ["quantile"], multiprocess_mode="max"
+)
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Stalls longer than LOOP_LAG_THRESHOLD_SECONDS by blocking route",
+    ["route"]
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and response size per
+    route template (e.g. /api/v1/applications/{application_id}/history), so
+    label cardinality stays bounded. Unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            in_progress.dec()
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            REQUESTS.labels(method, template, str(status_code)).inc()
+            REQUEST_DURATION.labels(method, template).observe(elapsed)
+            RESPONSE_SIZE.labels(method, template).observe(body_size)
+
+
+def metrics_response(request: Request) -> Response:
+    """Prometheus text exposition, aggregated over workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
@@ -1,10 +1,16 @@
 from app.models.application import ApplicationStatus
-from app.utils.email import send_email
+from app.core.delivery import queue_email
 from app.config import settings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Final statuses are always delivered immediately, never held in the coalescing window
+TERMINAL_STATUSES = {ApplicationStatus.ABGESCHLOSSEN, ApplicationStatus.ABGELEHNT}
+
 # Status messages in different languages
 STATUS_MESSAGES = {
     "de": {
@@ -67,6 +73,18 @@ EMAIL_SUBJECTS = {
     }
 }
 
+@dataclass
+class PendingStatusNotification:
+    """Status notification waiting for its coalescing window to close"""
+    email: str
+    status: ApplicationStatus
+    language: str
+    messages: List[str] = field(default_factory=list)
+    flush_task: Optional[asyncio.Task] = None
+
+# Pending notifications keyed by application ID (per worker process)
+_pending_notifications: Dict[str, PendingStatusNotification] = {}
+
 async def send_status_notification(
     email: str,
     application_id: str,
@@ -74,7 +92,73 @@ async def send_status_notification(
     custom_message: str = "",
     language: str = "de"
 ):
-    """Send status update notification via email"""
+    """
+    Send status update notification via email, coalescing rapid transitions.
+
+    The first transition of an application opens a window of
+    NOTIFICATION_COALESCE_MINUTES; further transitions inside it only update
+    the pending notification, so the citizen receives one email carrying the
+    latest status and every custom message. Terminal statuses flush at once.
+    """
+    window_seconds = settings.NOTIFICATION_COALESCE_MINUTES * 60
+    
+    pending = _pending_notifications.get(application_id)
+    if pending is None:
+        pending = PendingStatusNotification(email=email, status=status, language=language)
+        _pending_notifications[application_id] = pending
+    else:
+        pending.email = email
+        pending.status = status
+        pending.language = language
+    
+    if custom_message:
+        pending.messages.append(custom_message)
+    
+    if status in TERMINAL_STATUSES or window_seconds <= 0:
+        await flush_status_notification(application_id)
+        return
+    
+    if pending.flush_task is None:
+        pending.flush_task = asyncio.create_task(
+            _flush_after_window(application_id, window_seconds)
+        )
+        logger.info(f"Status notification for {application_id} held for {window_seconds}s")
+
+async def _flush_after_window(application_id: str, delay: float):
+    """Deliver the pending notification once its coalescing window closes"""
+    await asyncio.sleep(delay)
+    await flush_status_notification(application_id)
+
+async def flush_status_notification(application_id: str):
+    """Deliver the pending notification for an application right away"""
+    pending = _pending_notifications.pop(application_id, None)
+    if pending is None:
+        return
+    
+    if pending.flush_task is not None and pending.flush_task is not asyncio.current_task():
+        pending.flush_task.cancel()
+    
+    await _deliver_status_notification(
+        pending.email,
+        application_id,
+        pending.status,
+        "\n\n".join(pending.messages),
+        pending.language
+    )
+
+async def flush_all_status_notifications():
+    """Deliver every pending notification (used on shutdown)"""
+    for application_id in list(_pending_notifications):
+        await flush_status_notification(application_id)
+
+async def _deliver_status_notification(
+    email: str,
+    application_id: str,
+    status: ApplicationStatus,
+    custom_message: str = "",
+    language: str = "de"
+):
+    """Render and send a single status notification email"""
     try:
         # Get language-specific messages (fallback to German)
         if language not in STATUS_MESSAGES:
@@ -159,14 +243,14 @@ This is an automatically generated email. Please do not reply directly to this m
             """
         
         # Send email
-        await send_email(
+        await queue_email(
             to_email=email,
             subject=subject,
             body=body,
             is_html=False
         )
         
-        logger.info(f"Status notification sent to {email} for application {application_id}")
+        logger.info(f"Status notification queued for {email} for application {application_id}")
         
     except Exception as e:
         logger.error(f"Failed to send status notification: {str(e)}")
@@ -228,14 +312,14 @@ Your Leipzig Citizen Services Team
 فريق خدمات المواطنين في لايبزيغ
             """
         
-        await send_email(
+        await queue_email(
             to_email=email,
             subject=subject,
             body=body,
             is_html=False
         )
         
-        logger.info(f"Document request notification sent to {email} for application {application_id}")
+        logger.info(f"Document request notification queued for {email} for application {application_id}")
         
     except Exception as e:
         logger.error(f"Failed to send document request notification: {str(e)}")
@@ -305,14 +389,14 @@ Your Leipzig Citizen Services Team
 فريق خدمات المواطنين في لايبزيغ
             """
         
-        await send_email(
+        await queue_email(
             to_email=email,
             subject=subject,
             body=body,
             is_html=False
         )
         
-        logger.info(f"Appointment notification sent to {email} for application {application_id}")
+        logger.info(f"Appointment notification queued for {email} for application {application_id}")
         
     except Exception as e:
         logger.error(f"Failed to send appointment notification: {str(e)}")
@@ -0,0 +1,268 @@
+"""
+On-demand request profiling.
+
+A profiled request runs with a sampler thread that records the stack of
+the event loop thread every PROFILING_INTERVAL_MS. Routes are `async def`
+with synchronous database and serialization work, so that is where their
+time goes. Samples are stored as folded stacks (`a;b;c <count>`), which
+flamegraph.pl and speedscope render directly, and summarized per function
+and per top-level package (sqlalchemy, pydantic, logging, ...).
+
+Requests are profiled when they carry the PROFILING_HEADER with a bearer
+token (the profile is kept only if the caller turns out to be an admin),
+or every PROFILING_SAMPLE_RATE-th request. One request is profiled at a
+time per worker; other requests running concurrently on the loop show up
+in its samples. Profiling is off unless DEBUG or PROFILING_ENABLED is set.
+"""
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core.security import decode_access_token
+from app.models.user import UserRole
+import itertools
+import logging
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Innermost Python frames of a loop thread that is waiting for I/O
+# (uvloop waits in C below the frame that started the loop)
+IDLE_FRAMES = {
+    "selectors:select",
+    "asyncio.base_events:run_forever",
+    "asyncio.base_events:run_until_complete",
+    "asyncio.runners:run",
+}
+MAX_STACK_DEPTH = 128
+EXCLUDED_PATHS = ("/debug/profiles", "/metrics")
+
+
+def profiling_active() -> bool:
+    return settings.DEBUG or settings.PROFILING_ENABLED
+
+def frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+def stack_names(frame, limit: int = MAX_STACK_DEPTH) -> List[str]:
+    """Function names of a frame and its callers, outermost first"""
+    names = []
+    while frame is not None and len(names) < limit:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if frame_name(frame) in IDLE_FRAMES:
+                self.idle_samples += 1
+                continue
+            self.stacks[";".join(stack_names(frame))] += 1
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    trigger: str
+    created_at: datetime
+    route: Optional[str] = None
+    status_code: Optional[int] = None
+    duration_ms: float = 0.0
+    interval_ms: float = 0.0
+    idle_samples: int = 0
+    stacks: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def overview(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "trigger": self.trigger,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+        }
+
+    def summary(self, top: int = 30) -> dict:
+        """Sample counts per function (self and inclusive) and per package of the leaf frame"""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        packages: Counter = Counter()
+        for stack, count in self.stacks.items():
+            names = stack.split(";")
+            own[names[-1]] += count
+            packages[names[-1].split(".", 1)[0].split(":", 1)[0]] += count
+            for name in set(names):
+                inclusive[name] += count
+
+        # The sampler needs the GIL, so a busy loop thread is sampled less
+        # often than configured; the wall time per sample is what was observed
+        ms_per_sample = self.duration_ms / max(self.samples + self.idle_samples, 1)
+
+        def estimate(count: int) -> dict:
+            return {"samples": count, "ms": round(count * ms_per_sample, 2)}
+
+        return {
+            **self.overview(),
+            "interval_ms": self.interval_ms,
+            "ms_per_sample": round(ms_per_sample, 3),
+            "packages": {name: estimate(count) for name, count in packages.most_common()},
+            "self": [{"function": name, **estimate(count)} for name, count in own.most_common(top)],
+            "inclusive": [{"function": name, **estimate(count)} for name, count in inclusive.most_common(top)],
+        }
+
+
+class ProfileStore:
+    """The most recent profiles of this worker process"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(settings.PROFILING_MAX_STORED)
+
+
+def _has_bearer_token(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return False
+            payload = decode_access_token(token)
+            # Revocation is checked when the principal is resolved; profiles of non-admins are dropped
+            return payload is not None
+    return False
+
+def _is_admin(scope) -> bool:
+    principal = scope.get("state", {}).get("principal")
+    return principal is not None and principal.role == UserRole.ADMIN
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running selected requests under the stack sampler"""
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode("latin-1")
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith(EXCLUDED_PATHS):
+            return None
+        if any(name == self.header for name, _ in scope.get("headers", [])):
+            return "header" if _has_bearer_token(scope) else None
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate > 0 and next(self._counter) % rate == 0:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            id=uuid.uuid4().hex[:12],
+            method=scope["method"],
+            path=scope["path"],
+            trigger=trigger,
+            created_at=datetime.utcnow(),
+            interval_ms=settings.PROFILING_INTERVAL_MS,
+        )
+
+        def keep() -> bool:
+            return trigger == "sampled" or _is_admin(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if keep():
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", profile.id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000)
+        started_at = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._busy.release()
+            profile.duration_ms = (time.perf_counter() - started_at) * 1000
+            route = scope.get("route")
+            profile.route = getattr(route, "path_format", None) or getattr(route, "path", None)
+            profile.stacks = dict(sampler.stacks)
+            profile.idle_samples = sampler.idle_samples
+            if keep():
+                profile_store.add(profile)
+                logger.info(
+                    f"Profiled {profile.method} {profile.path} ({profile.trigger}): "
+                    f"{profile.duration_ms:.1f} ms, {profile.samples} samples, id {profile.id}"
+                )
@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+from app.config import settings
+from app.core.redis_client import get_async_redis_client, get_redis_client
+import asyncio
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushEvent:
+    """One message for push subscribers, rendered as a Server-Sent Event"""
+    id: int
+    event: str
+    data: dict
+
+    def encode(self) -> bytes:
+        payload = json.dumps(self.data, default=str, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """A bounded event queue owned by one open stream"""
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[PushEvent]" = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE)
+
+    def offer(self, event: PushEvent):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(event)
+        else:
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: PushEvent):
+        # A stalled client loses its oldest events rather than blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class PushBroker:
+    """
+    Fan-out of application events to open streams.
+
+    Topics are `application:<id>` for citizens watching one application and
+    `staff:<user id>` for a case worker's assigned queue. With
+    PUSH_BACKEND="memory" each worker process only sees events published by
+    its own requests (run a single worker). With "redis" events are
+    published on one Redis pub/sub channel and every worker's listener task
+    feeds them to its local subscribers, so a stream receives events
+    whichever worker handled the change.
+    """
+
+    def __init__(self, backend: str = "memory"):
+        if backend not in ("memory", "redis"):
+            raise ValueError(f"Unknown PUSH_BACKEND: {backend}")
+        self.backend = backend
+        self.channel = f"{settings.CACHE_KEY_PREFIX}:push"
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._ids = itertools.count(1)
+        self.subscriber_count = 0
+        self._listener: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        # One thread keeps publishes in order and Redis round-trips off the loop
+        self._publisher: Optional[ThreadPoolExecutor] = None
+
+    def subscribe(self, topic: str) -> Optional[Subscription]:
+        """Open a subscription; returns None when the worker is at capacity"""
+        if self.subscriber_count >= settings.PUSH_MAX_SUBSCRIBERS:
+            return None
+        subscription = Subscription(topic)
+        self._topics.setdefault(topic, set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            self.subscriber_count -= 1
+            if not subscribers:
+                del self._topics[subscription.topic]
+
+    def publish(self, topics: Iterable[str], event: str, data: dict):
+        """Deliver one event (with one event id) to every subscriber of the topics"""
+        if self.backend == "memory":
+            self.deliver(topics, event, data)
+            return
+        message = json.dumps({"topics": list(topics), "event": event, "data": data}, default=str)
+        if self._publisher is None:
+            self._publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="push-publish")
+        self._publisher.submit(self._publish_remote, message)
+
+    def _publish_remote(self, message: str):
+        try:
+            get_redis_client().publish(self.channel, message)
+        except Exception as e:
+            logger.warning(f"Push event could not be published: {str(e)}")
+
+    def deliver(self, topics: Iterable[str], event: str, data: dict):
+        """Hand an event to this worker's subscribers"""
+        message = None
+        for topic in topics:
+            for subscription in list(self._topics.get(topic, ())):
+                message = message or PushEvent(next(self._ids), event, data)
+                subscription.offer(message)
+
+    async def start(self):
+        """Start relaying events of other workers (Redis backend only)"""
+        if self.backend != "redis" or self._listener is not None:
+            return
+        self._ready = asyncio.Event()
+        self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Push listener is not subscribed yet; retrying in the background")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._publisher is not None:
+            await asyncio.to_thread(self._publisher.shutdown, True)
+            self._publisher = None
+
+    async def _listen(self):
+        while True:
+            client = get_async_redis_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self._ready.set()
+                logger.info(f"Push listener subscribed to {self.channel}")
+                async for message in pubsub.listen():
+                    self._relay(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Push listener lost Redis: {str(e)}; reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    def _relay(self, raw):
+        try:
+            message = json.loads(raw)
+            self.deliver(message["topics"], message["event"], message["data"])
+        except Exception as e:
+            logger.warning(f"Ignoring malformed push message: {str(e)}")
+
+
+push_broker = PushBroker(settings.PUSH_BACKEND)
+
+def application_topic(application_id: str) -> str:
+    return f"application:{application_id}"
+
+def staff_topic(user_id: str) -> str:
+    return f"staff:{user_id}"
+
+def publish_status_change(
+    application_id: str,
+    old_status,
+    new_status,
+    message: Optional[str] = None,
+    case_worker_id: Optional[str] = None,
+    event: str = "status"
+):
+    """Push a status transition to the application's watchers and its case worker"""
+    data = {
+        "application_id": application_id,
+        "old_status": getattr(old_status, "value", old_status),
+        "new_status": getattr(new_status, "value", new_status),
+        "message": message,
+        "case_worker_id": case_worker_id,
+        "at": datetime.utcnow().isoformat(),
+    }
+    topics = [application_topic(application_id)]
+    if case_worker_id:
+        topics.append(staff_topic(case_worker_id))
+    push_broker.publish(topics, event, data)
+
+def publish_assignment(
+    application_id: str,
+    status,
+    old_worker_id: Optional[str],
+    new_worker_id: str,
+    old_status=None
+):
+    """Push an assignment change; the previous case worker learns the item left their queue"""
+    publish_status_change(
+        application_id, old_status or status, status,
+        case_worker_id=new_worker_id, event="assigned"
+    )
+    if old_worker_id and old_worker_id != new_worker_id:
+        push_broker.publish([staff_topic(old_worker_id)], "unassigned", {
+            "application_id": application_id,
+            "case_worker_id": new_worker_id,
+            "at": datetime.utcnow().isoformat(),
+        })
+
+async def event_stream(
+    subscription: Subscription,
+    is_disconnected,
+    initial: Optional[PushEvent] = None
+) -> AsyncIterator[bytes]:
+    """
+    Yield SSE frames for a subscription until the client goes away.
+
+    A comment line is sent every PUSH_HEARTBEAT_SECONDS so proxies keep the
+    connection open and disconnects are noticed.
+    """
+    try:
+        yield f"retry: {settings.PUSH_RETRY_MILLISECONDS}\n\n".encode("utf-8")
+        if initial is not None:
+            yield initial.encode()
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.PUSH_HEARTBEAT_SECONDS
+                )
+                yield message.encode()
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield b": keep-alive\n\n"
+    finally:
+        push_broker.unsubscribe(subscription)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # disable nginx response buffering
+}
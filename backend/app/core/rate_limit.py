@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from app.config import settings
+from app.core.redis_client import get_redis_client
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets.
+
+    Implementations must make `consume` atomic for a key. The in-memory
+    backend only limits within one worker process; RATE_LIMIT_BACKEND=redis
+    shares the buckets between workers. Backends doing network I/O set
+    `blocking` so async callers run them in the thread pool.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until a token is available)"""
+
+    @abstractmethod
+    def reset(self, key: str):
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process token buckets, bounded to `max_keys` least recently used keys"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (1 - tokens) / rate
+        return allowed, retry_after
+
+    def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets shared by all workers: a hash (tokens, updated_at) per key,
+    updated in a WATCH/MULTI transaction and expiring once the bucket would
+    be full again. While Redis is unreachable requests are allowed (for a
+    second at a time) rather than failing logins and lookups.
+    """
+
+    blocking = True
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+        self._down_until = 0.0
+
+    def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        if time.monotonic() < self._down_until:
+            return True, 0.0
+        bucket_key = f"{self.prefix}:{key}"
+
+        def attempt(pipe) -> Tuple[bool, float]:
+            now = time.time()
+            state = pipe.hmget(bucket_key, "tokens", "updated_at")
+            tokens = float(capacity) if state[0] is None else float(state[0])
+            updated_at = now if state[1] is None else float(state[1])
+            tokens = min(float(capacity), tokens + max(now - updated_at, 0.0) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            pipe.multi()
+            pipe.hset(bucket_key, mapping={"tokens": tokens, "updated_at": now})
+            pipe.pexpire(bucket_key, max(1, math.ceil((capacity - tokens) / rate * 1000)))
+            return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+        try:
+            return self.client.transaction(attempt, bucket_key, value_from_callable=True)
+        except Exception as e:
+            self.errors += 1
+            self._down_until = time.monotonic() + 1.0
+            logger.warning(f"Redis rate limit check failed: {str(e)}")
+            return True, 0.0
+
+    def reset(self, key: str):
+        try:
+            self.client.delete(f"{self.prefix}:{key}")
+        except Exception as e:
+            logger.warning(f"Redis rate limit reset failed: {str(e)}")
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """Bucket storage selected by settings.RATE_LIMIT_BACKEND"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(get_redis_client(), f"{settings.CACHE_KEY_PREFIX}:ratelimit")
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return InMemoryRateLimitBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+
+_backend: RateLimitBackend = create_rate_limit_backend()
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    return _backend
+
+def set_rate_limit_backend(backend: RateLimitBackend):
+    """Swap the bucket storage, e.g. for a store shared between workers"""
+    global _backend
+    _backend = backend
+
+
+class TokenBucketLimiter:
+    """Token bucket allowing `capacity` requests in a burst and `per_minute` sustained"""
+
+    def __init__(self, name: str, per_minute: float, capacity: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+
+    def hit(self, key: str, backend: Optional[RateLimitBackend] = None) -> Tuple[bool, float]:
+        backend = backend or get_rate_limit_backend()
+        return backend.consume(f"{self.name}:{key}", self.rate, self.capacity)
+
+    def reset(self, key: str, backend: Optional[RateLimitBackend] = None):
+        (backend or get_rate_limit_backend()).reset(f"{self.name}:{key}")
+
+
+def raise_too_many_requests(retry_after: float, detail: str = "Too many requests, please try again later"):
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+login_ip_limiter = TokenBucketLimiter(
+    "login-ip", settings.LOGIN_RATE_PER_MINUTE_IP, settings.LOGIN_BURST_IP
+)
+login_user_limiter = TokenBucketLimiter(
+    "login-user", settings.LOGIN_RATE_PER_MINUTE_USER, settings.LOGIN_BURST_USER
+)
+
+def throttle_login(username: str, client_ip: str):
+    """
+    Reject a login attempt before any password hashing if either the client
+    IP or the target username has exhausted its budget.
+    """
+    allowed, retry_after = login_ip_limiter.hit(client_ip)
+    if allowed:
+        allowed, retry_after = login_user_limiter.hit(username.lower())
+    if not allowed:
+        raise_too_many_requests(retry_after, "Too many login attempts, please try again later")
+
+def reset_login_throttle(username: str):
+    """Give the username its full budget back after a successful login"""
+    login_user_limiter.reset(username.lower())
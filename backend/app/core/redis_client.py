@@ -0,0 +1,65 @@
+"""
+Shared Redis connections (caches, token store, rate limits, push fan-out).
+
+Clients are created lazily, so nothing connects unless a Redis-backed
+feature is configured. Payloads that are unpickled after a round-trip
+through Redis are signed with a key derived from SECRET_KEY; anyone who can
+write to the server but does not know the secret cannot inject objects.
+"""
+from typing import Any, Optional
+from app.config import settings
+import hashlib
+import hmac
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_signing_key: Optional[bytes] = None
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+
+class InvalidSignature(Exception):
+    """A stored payload was not written by this application"""
+
+
+def get_redis_client():
+    """Process-wide redis-py client for settings.REDIS_URL"""
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+        )
+    return _client
+
+def get_async_redis_client():
+    """
+    New redis.asyncio client for long-lived connections such as pub/sub
+    listeners. Async clients belong to the event loop they were created on,
+    so these are not shared.
+    """
+    import redis.asyncio
+    return redis.asyncio.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+    )
+
+def _key() -> bytes:
+    global _signing_key
+    if _signing_key is None:
+        _signing_key = hmac.new(settings.SECRET_KEY.encode(), b"redis-payload", hashlib.sha256).digest()
+    return _signing_key
+
+def dumps_signed(value: Any) -> bytes:
+    payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return hmac.new(_key(), payload, hashlib.sha256).digest() + payload
+
+def loads_signed(raw: bytes) -> Any:
+    signature, payload = raw[:SIGNATURE_SIZE], raw[SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, hmac.new(_key(), payload, hashlib.sha256).digest()):
+        raise InvalidSignature("Payload signature mismatch")
+    return pickle.loads(payload)
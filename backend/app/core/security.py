@@ -1,12 +1,37 @@
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
 from jose import jwt
 from passlib.context import CryptContext
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED, PASSWORD_HASH_WAIT
 from app.config import settings
+import asyncio
+import threading
+import time
+import uuid
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs here so it never blocks the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_stats_lock = threading.Lock()
+_hash_stats = {
+    "queued": 0,
+    "active": 0,
+    "completed": 0,
+    "rejected": 0,
+    "max_queue_depth": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; the request should be retried later"""
+
 # JWT settings
 ALGORITHM = "HS256"
 
@@ -20,6 +45,7 @@ def create_access_token(
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     to_encode.update({"exp": expire, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -28,6 +54,7 @@ def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=30)
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     to_encode.update({"exp": expire, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -37,8 +64,65 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash"""
-    return pwd_context.hash(password)
+    """Generate password hash with the configured bcrypt cost"""
+    return pwd_context.handler("bcrypt").using(rounds=settings.BCRYPT_ROUNDS).hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash uses a deprecated scheme or a different bcrypt cost"""
+    if pwd_context.needs_update(hashed_password):
+        return True
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def _run_hashing(func: Callable, *args):
+    """Run a hashing call on the bounded pool, tracking queue depth"""
+    with _hash_stats_lock:
+        if _hash_stats["queued"] >= settings.PASSWORD_HASH_MAX_QUEUE:
+            _hash_stats["rejected"] += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHashingBusy()
+        _hash_stats["queued"] += 1
+        _hash_stats["max_queue_depth"] = max(_hash_stats["max_queue_depth"], _hash_stats["queued"])
+    submitted_at = time.perf_counter()
+    
+    def job():
+        started_at = time.perf_counter()
+        with _hash_stats_lock:
+            _hash_stats["queued"] -= 1
+            _hash_stats["active"] += 1
+            _hash_stats["total_wait_seconds"] += started_at - submitted_at
+        PASSWORD_HASH_WAIT.observe(started_at - submitted_at)
+        try:
+            return func(*args)
+        finally:
+            run_seconds = time.perf_counter() - started_at
+            PASSWORD_HASH_DURATION.observe(run_seconds)
+            with _hash_stats_lock:
+                _hash_stats["active"] -= 1
+                _hash_stats["completed"] += 1
+                _hash_stats["total_run_seconds"] += run_seconds
+    
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, job)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await _run_hashing(get_password_hash, password)
+
+def get_hashing_stats() -> dict:
+    """Queue depth and timing of the password hashing pool"""
+    with _hash_stats_lock:
+        stats = dict(_hash_stats)
+    completed = stats["completed"] or 1
+    stats["workers"] = settings.PASSWORD_HASH_WORKERS
+    stats["avg_wait_ms"] = round(stats.pop("total_wait_seconds") / completed * 1000, 2)
+    stats["avg_run_ms"] = round(stats.pop("total_run_seconds") / completed * 1000, 2)
+    return stats
 
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode JWT token"""
@@ -92,8 +176,8 @@ def verify_email_token(token: str) -> Optional[str]:
         pass
     return None
 
-def get_current_user(token: str) -> Union[dict, None]:
-    """Get current user from token"""
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode an access token; returns None for invalid, expired or non-access tokens"""
     payload = verify_token(token)
     if payload and payload.get("type") == "access":
         return payload
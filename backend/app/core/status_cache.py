@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Optional
+from app.core.cache import create_cache
+from app.config import settings
+import hashlib
+
+
+@dataclass
+class CachedStatus:
+    """Serialized public status response of one application"""
+    date_of_birth: str
+    etag: str
+    body: bytes
+
+
+# Short-lived per-application responses for the public status check
+status_response_cache = create_cache(
+    "status",
+    ttl=settings.STATUS_CACHE_TTL_SECONDS,
+    max_size=settings.STATUS_CACHE_MAX_SIZE
+)
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag of the serialized response. Hashing the body rather than
+    updated_at (which the database may store with one-second resolution)
+    means two changes within the same second still get different tags.
+    """
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    return f'"{digest}"'
+
+async def get_cached_status(application_id: str) -> Optional[CachedStatus]:
+    return await status_response_cache.aget(application_id)
+
+async def cache_status(application_id: str, entry: CachedStatus):
+    await status_response_cache.aset(application_id, entry)
+
+async def invalidate_status_cache(application_id: str):
+    """Call on any change to an application (status, assignment, details)"""
+    await status_response_cache.adelete(application_id)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against the current ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
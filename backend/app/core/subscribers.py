@@ -0,0 +1,113 @@
+"""Side effects of application lifecycle events (registered on import)"""
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.application import StatusUpdate, ApplicationStatus
+from app.core.events import event_bus, ApplicationSubmitted, StatusChanged, Assigned, DocumentUploaded
+from app.core.notifications import send_status_notification
+from app.core.status_cache import invalidate_status_cache
+from app.core.dashboard_cache import invalidate_dashboards
+from app.core.id_guard import application_id_filter
+from app.core.push import publish_status_change, publish_assignment
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+# In the committing transaction: status history rows
+
+@event_bus.in_transaction(ApplicationSubmitted)
+def record_submissions(db: Session, events: List[ApplicationSubmitted]):
+    db.add_all([
+        StatusUpdate(
+            id=str(uuid.uuid4()),
+            application_id=e.application_id,
+            old_status=None,
+            new_status=ApplicationStatus.EINGEGANGEN,
+            message="Application submitted successfully",
+        )
+        for e in events
+    ])
+
+@event_bus.in_transaction(StatusChanged)
+def record_status_changes(db: Session, events: List[StatusChanged]):
+    db.add_all([
+        StatusUpdate(
+            id=str(uuid.uuid4()),
+            application_id=e.application_id,
+            old_status=e.old_status,
+            new_status=e.new_status,
+            message=e.message,
+        )
+        for e in events
+    ])
+
+@event_bus.in_transaction(Assigned)
+def record_assignments(db: Session, events: List[Assigned]):
+    db.add_all([
+        StatusUpdate(
+            id=str(uuid.uuid4()),
+            application_id=e.application_id,
+            old_status=e.old_status or e.status,
+            new_status=e.status,
+            message=e.message,
+        )
+        for e in events
+    ])
+
+
+# After commit: caches, push streams, notifications
+
+@event_bus.after_commit(ApplicationSubmitted)
+async def register_application_ids(events: List[ApplicationSubmitted]):
+    application_ids = [e.application_id for e in events]
+    if application_id_filter.backend == "redis":
+        await asyncio.to_thread(application_id_filter.register, application_ids)
+    else:
+        application_id_filter.register(application_ids)
+
+@event_bus.after_commit(StatusChanged, Assigned, DocumentUploaded)
+async def invalidate_cached_status(events):
+    for e in events:
+        await invalidate_status_cache(e.application_id)
+
+@event_bus.after_commit(ApplicationSubmitted, StatusChanged, Assigned)
+async def invalidate_dashboard_summaries(events):
+    await invalidate_dashboards()
+
+@event_bus.after_commit(StatusChanged)
+async def push_status_changes(events: List[StatusChanged]):
+    for e in events:
+        publish_status_change(e.application_id, e.old_status, e.new_status, e.message, e.case_worker_id)
+
+@event_bus.after_commit(Assigned)
+async def push_assignments(events: List[Assigned]):
+    for e in events:
+        publish_assignment(e.application_id, e.status, e.old_worker_id, e.new_worker_id, e.old_status)
+
+@event_bus.after_commit(ApplicationSubmitted)
+async def send_submission_confirmations(events: List[ApplicationSubmitted]):
+    for e in events:
+        if not e.notify:
+            continue
+        await send_status_notification(
+            e.email,
+            e.application_id,
+            ApplicationStatus.EINGEGANGEN,
+            f"Your application has been received. Reference number: {e.application_id}",
+            e.language
+        )
+
+@event_bus.after_commit(StatusChanged)
+async def send_status_notifications(events: List[StatusChanged]):
+    for e in events:
+        if e.notify:
+            await send_status_notification(e.email, e.application_id, e.new_status, e.message, e.language)
+
+@event_bus.after_commit(Assigned)
+async def send_assignment_status_notifications(events: List[Assigned]):
+    # The citizen only hears about the status change, in their language's template
+    for e in events:
+        if e.old_status is not None and e.old_status != e.status and e.email:
+            await send_status_notification(e.email, e.application_id, e.status, language=e.language)
@@ -0,0 +1,142 @@
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Optional
+from app.database import SessionLocal
+from app.models.application import Application, ApplicationStatus
+from app.models.user import User, UserStatus
+from app.utils.email import build_email_message, render_daily_summary_email, send_bulk_messages
+from app.core.delivery import get_delivery_scheduler, is_permanent_failure, shutdown_delivery_scheduler
+from app.config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (ApplicationStatus.ABGESCHLOSSEN, ApplicationStatus.ABGELEHNT)
+
+def _empty_summary(day: date) -> dict:
+    return {
+        "date": day.strftime("%d.%m.%Y"),
+        "new_applications": 0,
+        "processed_applications": 0,
+        "completed_applications": 0,
+        "pending_applications": 0,
+        "status_counts": {},
+        "urgent_count": 0,
+        "review_count": 0,
+        "followup_count": 0,
+    }
+
+def build_daily_summaries(db: Session, day: date) -> Dict[str, dict]:
+    """
+    Compute the daily summary of every case worker in one grouped query.
+
+    Returns a mapping of case_worker_id to the summary_data dict expected by
+    send_daily_summary_email.
+    """
+    day_start = datetime.combine(day, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    def on_day(column):
+        return case((and_(column >= day_start, column < day_end), 1), else_=0)
+
+    rows = db.query(
+        Application.case_worker_id,
+        Application.status,
+        func.count(Application.id),
+        func.sum(on_day(Application.submitted_at)),
+        func.sum(on_day(Application.updated_at)),
+        func.sum(on_day(Application.actual_completion)),
+        func.sum(case((Application.is_urgent == True, 1), else_=0)),
+    ).filter(
+        Application.case_worker_id.isnot(None)
+    ).group_by(
+        Application.case_worker_id,
+        Application.status
+    ).all()
+
+    summaries: Dict[str, dict] = {}
+    for worker_id, status, count, new, processed, completed, urgent in rows:
+        summary = summaries.setdefault(worker_id, _empty_summary(day))
+        summary["status_counts"][status.value] = count
+        summary["new_applications"] += new or 0
+        summary["processed_applications"] += processed or 0
+        summary["completed_applications"] += completed or 0
+
+        if status not in TERMINAL_STATUSES:
+            summary["pending_applications"] += count
+            summary["urgent_count"] += urgent or 0
+        if status == ApplicationStatus.PRUEFUNG:
+            summary["review_count"] += count
+        if status == ApplicationStatus.NACHFRAGE:
+            summary["followup_count"] += count
+
+    return summaries
+
+async def send_daily_summaries(day: Optional[date] = None) -> int:
+    """Build, render and send the daily summary of every active staff member"""
+    day = day or date.today()
+
+    def load():
+        db = SessionLocal()
+        try:
+            summaries = build_daily_summaries(db, day)
+            recipients = db.query(User.id, User.email, User.first_name).filter(
+                User.status == UserStatus.ACTIVE,
+                User.email_notifications == True
+            ).all()
+            return summaries, recipients
+        finally:
+            db.close()
+
+    summaries, recipients = await asyncio.to_thread(load)
+
+    messages = []
+    for user_id, email, first_name in recipients:
+        subject, body = render_daily_summary_email(
+            first_name, summaries.get(user_id) or _empty_summary(day)
+        )
+        messages.append(build_email_message(email, subject, body))
+
+    if not messages:
+        return 0
+
+    result = await send_bulk_messages(messages)
+    requeued = 0
+    for message, error in result.failed:
+        if is_permanent_failure(error):
+            logger.warning(f"Daily summary to {message['To']} rejected by the relay: {str(error)}")
+        else:
+            # Retried with backoff (and the circuit breaker) by the delivery scheduler
+            get_delivery_scheduler().submit(message)
+            requeued += 1
+    logger.info(f"Daily summaries sent: {result.sent}/{len(messages)}, requeued: {requeued}")
+    return result.sent
+
+def _seconds_until(hour: int) -> float:
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+async def daily_summary_loop():
+    """Send the summaries every day at DAILY_SUMMARY_HOUR (local time)"""
+    while True:
+        await asyncio.sleep(_seconds_until(settings.DAILY_SUMMARY_HOUR))
+        try:
+            await send_daily_summaries()
+        except Exception as e:
+            logger.error(f"Daily summary job failed: {str(e)}")
+
+if __name__ == "__main__":
+    # Allows running the job from cron: python -m app.core.summaries
+    logging.basicConfig(level=logging.INFO)
+
+    async def run_once():
+        await send_daily_summaries()
+        # Give requeued summaries their retries before the process exits
+        await shutdown_delivery_scheduler(timeout=settings.EMAIL_RETRY_MAX_SECONDS * 2)
+
+    asyncio.run(run_once())
@@ -0,0 +1,307 @@
+"""
+Revoked token IDs and refresh-token families.
+
+With TOKEN_STORE_BACKEND="redis" the state is shared by all workers and
+survives restarts, every key expiring together with the token it belongs
+to. The "memory" backend keeps it per process, for tests and single-process
+development.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from app.config import settings
+from app.core.redis_client import get_redis_client
+from app.core.security import create_refresh_token
+import heapq
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Matches the 30 day lifetime set in create_refresh_token
+REFRESH_TOKEN_LIFETIME_SECONDS = 30 * 24 * 3600
+
+
+class RefreshTokenReuse(Exception):
+    """A rotated-out or unknown refresh token was presented; its family is revoked"""
+
+
+def _jti_key(jti: str) -> bytes:
+    """Token IDs are uuid4 hex strings; store them as 16 raw bytes"""
+    try:
+        return bytes.fromhex(jti)
+    except ValueError:
+        return jti.encode()
+
+
+class RevocationStore(ABC):
+    """
+    Revoked token IDs, each dropped automatically once the token it belongs
+    to has expired (after that the JWT signature check rejects it anyway).
+    """
+
+    @abstractmethod
+    def add(self, jti: str, expires_at: float):
+        ...
+
+    @abstractmethod
+    def __contains__(self, jti: str) -> bool:
+        ...
+
+
+class RevocationSet(RevocationStore):
+    """Per-process revocations with a heap of expiry times"""
+
+    def __init__(self):
+        self._entries: Dict[bytes, float] = {}
+        self._expiry_heap: List[Tuple[float, bytes]] = []
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: float):
+        key = _jti_key(jti)
+        with self._lock:
+            self._purge(time.time())
+            if key not in self._entries:
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._entries[key] = expires_at
+
+    def __contains__(self, jti: str) -> bool:
+        expires_at = self._entries.get(_jti_key(jti))
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _purge(self, now: float):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, key = heapq.heappop(self._expiry_heap)
+            self._entries.pop(key, None)
+
+
+class RedisRevocationStore(RevocationStore):
+    """One key per revoked token ID, expiring with the token"""
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, jti: str) -> str:
+        return f"{self.prefix}:revoked:{jti}"
+
+    def add(self, jti: str, expires_at: float):
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms > 0:
+            self.client.set(self._key(jti), 1, px=ttl_ms)
+
+    def __contains__(self, jti: str) -> bool:
+        try:
+            return bool(self.client.exists(self._key(jti)))
+        except Exception as e:
+            # Access tokens are short-lived; an outage must not lock everyone out
+            logger.warning(f"Revocation check failed: {str(e)}")
+            return False
+
+
+class RefreshTokenStore(ABC):
+    """
+    Refresh-token families with rotation and reuse detection.
+
+    Every login starts a family; each refresh revokes the presented token and
+    issues its successor in the same family. Presenting a token that is not
+    the family's current one means it was stolen or replayed, so the whole
+    family is revoked and the user has to log in again. Tokens of unknown
+    families (expired, revoked or never issued here) are rejected.
+    """
+
+    def __init__(self, revoked: RevocationStore):
+        self.revoked = revoked
+
+    @abstractmethod
+    def issue(self, username: str) -> str:
+        """Create a refresh token starting a new family (on login)"""
+
+    @abstractmethod
+    def rotate(self, payload: dict) -> str:
+        """Validate a decoded refresh token and return its successor"""
+
+    @abstractmethod
+    def revoke_user(self, username: str):
+        """Revoke every refresh-token family of a user (logout, password change)"""
+
+    @staticmethod
+    def _claims(payload: dict) -> Tuple[str, str, str]:
+        jti, family, username = payload.get("jti"), payload.get("fam"), payload.get("sub")
+        if not jti or not family or not username:
+            raise RefreshTokenReuse("Refresh token has no rotation claims")
+        return jti, family, username
+
+    @staticmethod
+    def _new_token(username: str, family: str) -> Tuple[str, str]:
+        jti = uuid.uuid4().hex
+        return jti, create_refresh_token(data={"sub": username, "jti": jti, "fam": family})
+
+    @staticmethod
+    def _reuse_detected(username: str):
+        logger.warning(f"Refresh token reuse detected for {username}; family revoked")
+        return RefreshTokenReuse("Refresh token has already been used")
+
+
+@dataclass
+class TokenFamily:
+    username: str
+    current_jti: str
+    expires_at: float
+
+
+class InMemoryRefreshTokenStore(RefreshTokenStore):
+    """Families in a dictionary of this process"""
+
+    def __init__(self, revoked: RevocationStore):
+        super().__init__(revoked)
+        self._families: Dict[str, TokenFamily] = {}
+        self._user_families: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    def issue(self, username: str) -> str:
+        with self._lock:
+            self._purge_expired_families()
+            return self._issue_locked(username, uuid.uuid4().hex)
+
+    def rotate(self, payload: dict) -> str:
+        jti, family, username = self._claims(payload)
+        with self._lock:
+            state = self._families.get(family)
+            if state is not None and state.current_jti == jti and state.username == username \
+                    and jti not in self.revoked:
+                self.revoked.add(jti, payload.get("exp", time.time()))
+                return self._issue_locked(username, family)
+            self._revoke_family_locked(family)
+        raise self._reuse_detected(username)
+
+    def _issue_locked(self, username: str, family: str) -> str:
+        jti, token = self._new_token(username, family)
+        expires_at = time.time() + REFRESH_TOKEN_LIFETIME_SECONDS
+        self._families[family] = TokenFamily(username, jti, expires_at)
+        self._user_families.setdefault(username, set()).add(family)
+        return token
+
+    def revoke_user(self, username: str):
+        with self._lock:
+            for family in list(self._user_families.get(username, ())):
+                self._revoke_family_locked(family)
+
+    def _revoke_family_locked(self, family: str):
+        state = self._families.pop(family, None)
+        if state is None:
+            return
+        self.revoked.add(state.current_jti, state.expires_at)
+        families = self._user_families.get(state.username)
+        if families is not None:
+            families.discard(family)
+            if not families:
+                del self._user_families[state.username]
+
+    def _purge_expired_families(self):
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        for family in [f for f, state in self._families.items() if state.expires_at <= now]:
+            self._revoke_family_locked(family)
+
+
+class RedisRefreshTokenStore(RefreshTokenStore):
+    """
+    Families shared by all workers: a hash (user, current token ID) per
+    family expiring REFRESH_TOKEN_LIFETIME_SECONDS after its last rotation,
+    and a set of family IDs per user. Rotation is a WATCH/MULTI transaction,
+    so two workers cannot both accept the same token.
+    """
+
+    def __init__(self, revoked: RevocationStore, client, prefix: str):
+        super().__init__(revoked)
+        self.client = client
+        self.prefix = prefix
+
+    def _family_key(self, family: str) -> str:
+        return f"{self.prefix}:refresh-family:{family}"
+
+    def _user_key(self, username: str) -> str:
+        return f"{self.prefix}:refresh-families:{username}"
+
+    def issue(self, username: str) -> str:
+        family = uuid.uuid4().hex
+        jti, token = self._new_token(username, family)
+        pipe = self.client.pipeline()
+        self._store_family(pipe, family, username, jti)
+        pipe.execute()
+        return token
+
+    def _store_family(self, pipe, family: str, username: str, jti: str):
+        pipe.hset(self._family_key(family), mapping={"user": username, "jti": jti})
+        pipe.expire(self._family_key(family), REFRESH_TOKEN_LIFETIME_SECONDS)
+        pipe.sadd(self._user_key(username), family)
+        pipe.expire(self._user_key(username), REFRESH_TOKEN_LIFETIME_SECONDS)
+
+    def rotate(self, payload: dict) -> str:
+        jti, family, username = self._claims(payload)
+        new_jti, token = self._new_token(username, family)
+        family_key = self._family_key(family)
+
+        def attempt(pipe) -> bool:
+            state = pipe.hgetall(family_key)
+            if state.get(b"user") != username.encode() or state.get(b"jti") != jti.encode():
+                return False
+            pipe.multi()
+            self._store_family(pipe, family, username, new_jti)
+            return True
+
+        if jti not in self.revoked and self.client.transaction(attempt, family_key, value_from_callable=True):
+            self.revoked.add(jti, payload.get("exp", time.time()))
+            return token
+        self._revoke_family(family)
+        raise self._reuse_detected(username)
+
+    def revoke_user(self, username: str):
+        for family in self.client.smembers(self._user_key(username)):
+            self._revoke_family(family.decode())
+
+    def _revoke_family(self, family: str):
+        family_key = self._family_key(family)
+        state = self.client.hgetall(family_key)
+        if not state:
+            return
+        self.revoked.add(state[b"jti"].decode(), time.time() + max(self.client.ttl(family_key), 0))
+        pipe = self.client.pipeline()
+        pipe.delete(family_key)
+        pipe.srem(self._user_key(state[b"user"].decode()), family)
+        pipe.execute()
+
+
+def create_token_stores() -> Tuple[RevocationStore, RefreshTokenStore]:
+    """Revocations and refresh families on the configured backend"""
+    if settings.TOKEN_STORE_BACKEND == "redis":
+        prefix = f"{settings.CACHE_KEY_PREFIX}:auth"
+        revoked = RedisRevocationStore(get_redis_client(), prefix)
+        return revoked, RedisRefreshTokenStore(revoked, get_redis_client(), prefix)
+    if settings.TOKEN_STORE_BACKEND == "memory":
+        revoked = RevocationSet()
+        return revoked, InMemoryRefreshTokenStore(revoked)
+    raise ValueError(f"Unknown TOKEN_STORE_BACKEND: {settings.TOKEN_STORE_BACKEND}")
+
+
+revoked_tokens, refresh_token_store = create_token_stores()
+
+def is_token_revoked(payload: dict) -> bool:
+    """Hot-path check for access and refresh tokens"""
+    jti = payload.get("jti")
+    return jti is not None and jti in revoked_tokens
+
+def revoke_token(payload: dict):
+    """Revoke a single decoded token until it expires"""
+    jti = payload.get("jti")
+    if jti:
+        revoked_tokens.add(jti, payload.get("exp", time.time()))
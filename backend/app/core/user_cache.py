@@ -0,0 +1,78 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Optional
+from app.core.cache import create_cache
+from app.models.user import User
+from app.config import settings
+
+# Column snapshots of authenticated users keyed by username
+principal_cache = create_cache(
+    "principal",
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE
+)
+
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+def cache_user(user: User):
+    """Store a column snapshot of a freshly loaded user"""
+    principal_cache.set(user.username, {key: getattr(user, key) for key in _USER_COLUMNS})
+
+def get_cached_user(db: Session, username: str) -> Optional[User]:
+    """
+    Return the cached user attached to `db`, or None on a miss.
+
+    The snapshot is merged without loading, so no SELECT is emitted and
+    changes made by the route (e.g. a new password) are still persisted.
+    """
+    snapshot = principal_cache.get(username)
+    if snapshot is None:
+        return None
+
+    user = User.__mapper__.class_manager.new_instance()
+    for key, value in snapshot.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def invalidate_user(username: Optional[str]):
+    """Drop a user from the cache now (blocking with Redis)"""
+    if username:
+        principal_cache.delete(username)
+
+async def invalidate_user_async(username: Optional[str]):
+    """Drop a user from the cache from a route (logout)"""
+    if username:
+        await principal_cache.adelete(username)
+
+def _mark_stale(target, username: Optional[str]):
+    session = object_session(target)
+    if session is None:
+        invalidate_user(username)
+    elif username:
+        session.info.setdefault("stale_principals", set()).add(username)
+
+def _invalidate_on_change(target, value, oldvalue, initiator):
+    _mark_stale(target, target.username)
+
+def _invalidate_on_rename(target, value, oldvalue, initiator):
+    if isinstance(oldvalue, str):
+        _mark_stale(target, oldvalue)
+
+# Changes to security-relevant columns evict the cached principal once they
+# are committed; evicting earlier would let a concurrent request re-cache the
+# old row for the whole TTL
+for _attribute in (User.role, User.status, User.hashed_password):
+    event.listen(_attribute, "set", _invalidate_on_change)
+event.listen(User.username, "set", _invalidate_on_rename)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for username in session.info.pop("stale_principals", ()):
+        invalidate_user(username)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_stale(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop("stale_principals", None)
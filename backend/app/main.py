@@ -1,12 +1,25 @@
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from app.api.v1 import applications, auth, staff
-from app.core.security import get_current_user
+from app.api.deps import get_current_staff_user, get_current_admin_user
+from app.core.security import PasswordHashingBusy
+from app.core.notifications import flush_all_status_notifications
+from app.core.delivery import shutdown_delivery_scheduler
+from app.core.summaries import daily_summary_loop
+from app.core.activity import start_activity_flusher, stop_activity_flusher
+from app.core.id_guard import application_id_filter
+from app.core.events import event_bus
+from app.core.push import push_broker
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.profiling import ProfilingMiddleware, profiling_active
+from app.core.loop_monitor import loop_monitor
+from app.core import subscribers  # registers application event handlers
 from app.database import engine, Base
 from app.config import settings
 import uvicorn
+import asyncio
 import logging
 
 # Set up logging
@@ -38,6 +51,15 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": f"Internal server error: {str(exc)}"}
     )
 
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    logger.warning("Password hashing queue full, rejecting request")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 # CORS middleware - with validation
 try:
     cors_origins = settings.CORS_ORIGINS.split(",") if isinstance(settings.CORS_ORIGINS, str) else settings.CORS_ORIGINS
@@ -77,6 +99,14 @@ try:
 except Exception as e:
     logger.error(f"Error setting up TrustedHostMiddleware: {e}")
 
+if profiling_active():
+    app.add_middleware(ProfilingMiddleware)
+    logger.info(f"Request profiling enabled (header {settings.PROFILING_HEADER}, sample rate {settings.PROFILING_SAMPLE_RATE})")
+
+# Outermost, so rejected hosts and CORS preflights are counted too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API routers with error handling
 try:
     app.include_router(
@@ -103,12 +133,54 @@ try:
         staff.router,
         prefix="/api/v1/staff",
         tags=["staff"],
-        dependencies=[Depends(get_current_user)]
+        dependencies=[Depends(get_current_staff_user)]
     )
     logger.info("Staff router included")
 except Exception as e:
     logger.error(f"Error including staff router: {e}")
 
+if profiling_active():
+    from app.api.v1 import debug
+    app.include_router(
+        debug.router,
+        prefix="/debug",
+        tags=["debug"],
+        dependencies=[Depends(get_current_admin_user)]
+    )
+
+# Long-running jobs started with the app
+background_jobs = []
+
+@app.on_event("startup")
+async def startup_event():
+    """Start scheduled background jobs"""
+    event_bus.bind_loop(asyncio.get_running_loop())
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start(app)
+    start_activity_flusher()
+    await push_broker.start()
+    # Lookups go to the route's query until the filter is built
+    application_id_filter.start()
+    if settings.DAILY_SUMMARY_ENABLED:
+        background_jobs.append(asyncio.create_task(daily_summary_loop()))
+        logger.info(f"Daily summary job scheduled for {settings.DAILY_SUMMARY_HOUR}:00")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered writes and notifications and drain the email queue before exit"""
+    for job in background_jobs:
+        job.cancel()
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    await stop_activity_flusher()
+    await event_bus.drain()
+    await push_broker.stop()
+    await asyncio.to_thread(application_id_filter.stop)
+    await flush_all_status_notifications()
+    logger.info("Pending status notifications flushed")
+    await shutdown_delivery_scheduler()
+    logger.info("Email delivery scheduler stopped")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -120,6 +192,13 @@ async def root():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics (all workers when running under app.server)"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response(request)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -145,11 +224,15 @@ async def debug_config():
     }
 
 if __name__ == "__main__":
-    logger.info("Starting server...")
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG,
-        log_level="info"
-    )
\ No newline at end of file
+    if settings.DEBUG:
+        logger.info("Starting development server...")
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        from app.server import run
+        run()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, Text, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Enum, Text, Boolean, ForeignKey, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -69,6 +69,13 @@ class Application(Base):
     documents = relationship("Document", back_populates="application")
     messages = relationship("Message", back_populates="application")
 
+class IdSequence(Base):
+    """Counters handed out in blocks by app.core.application_ids (one row per year)"""
+    __tablename__ = "id_sequences"
+    
+    name = Column(String, primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=0)
+
 class StatusUpdate(Base):
     __tablename__ = "status_updates"
     
@@ -53,6 +53,7 @@ class ApplicationResponse(ApplicationBase):
     
     class Config:
         from_attributes = True
+        populate_by_name = True
 
 class ApplicationStatusCheck(BaseModel):
     application_id: str
@@ -0,0 +1,153 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.server
+
+The app is imported once in the master and forked into WEB_CONCURRENCY
+workers (default: the CPUs available to the process). Workers are recycled
+after about MAX_REQUESTS requests. On SIGTERM each worker stops accepting
+connections, gives in-flight requests (and open event streams) up to
+SHUTDOWN_DRAIN_SECONDS, then runs the app's shutdown hooks, which flush
+buffered activity and notifications and drain the email queue.
+
+Per-process backends cannot serve several or recycled workers: the server
+refuses to start with TOKEN_STORE_BACKEND=memory in that case and warns
+about the others.
+"""
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+from app.config import settings
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Time the app's shutdown hooks get after requests have drained
+SHUTDOWN_HOOKS_SECONDS = 15
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+def default_worker_count() -> int:
+    """CPUs this process may run on (respects container CPU affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": settings.SHUTDOWN_DRAIN_SECONDS,
+    }
+
+
+def post_fork(server, worker):
+    """Connections opened in the master (table creation at import) must not be shared"""
+    from app.database import engine
+    engine.dispose(close=False)
+
+def child_exit(server, worker):
+    """Drop the live gauges of a dead worker from the aggregated metrics"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+def check_process_backends(workers: int, max_requests: int):
+    """
+    Refuse configurations that break authentication: the memory token store
+    lives in one worker process, so with several workers a refresh or logout
+    only works on the worker that issued the token, and recycling a worker
+    forgets its refresh tokens and re-validates revoked ones.
+    """
+    if settings.TOKEN_STORE_BACKEND == "memory" and (workers > 1 or max_requests > 0):
+        raise SystemExit(
+            "TOKEN_STORE_BACKEND=memory does not work with several or recycled workers; "
+            "set TOKEN_STORE_BACKEND=redis (or WEB_CONCURRENCY=1 and MAX_REQUESTS=0)"
+        )
+
+def when_ready(server):
+    server.log.info(
+        f"Serving with {server.cfg.workers} workers "
+        f"(loop={ProductionUvicornWorker.CONFIG_KWARGS['loop']}, "
+        f"http={ProductionUvicornWorker.CONFIG_KWARGS['http']})"
+    )
+    if settings.PUSH_BACKEND == "memory" and server.cfg.workers > 1:
+        server.log.warning(
+            "PUSH_BACKEND=memory: event streams only see changes made by their own worker; "
+            "set PUSH_BACKEND=redis or WEB_CONCURRENCY=1"
+        )
+    if settings.RATE_LIMIT_BACKEND == "memory" and server.cfg.workers > 1:
+        server.log.warning(
+            f"RATE_LIMIT_BACKEND=memory: each worker keeps its own login and lookup budgets, "
+            f"so clients get up to {server.cfg.workers}x the configured rates; set RATE_LIMIT_BACKEND=redis"
+        )
+    if settings.ID_FILTER_BACKEND == "memory" and server.cfg.workers > 1:
+        server.log.warning(
+            "ID_FILTER_BACKEND=memory: a new application is unknown to the other workers' "
+            f"lookup filters for up to {settings.BLOOM_REBUILD_SECONDS:.0f}s; "
+            "set ID_FILTER_BACKEND=redis or WEB_CONCURRENCY=1"
+        )
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WEB_CONCURRENCY or default_worker_count(),
+        "worker_class": "app.server.ProductionUvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.SHUTDOWN_DRAIN_SECONDS + SHUTDOWN_HOOKS_SECONDS,
+        "timeout": 60,
+        "keepalive": 5,
+        "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+        "accesslog": "-",
+        "errorlog": "-",
+        "loglevel": settings.LOG_LEVEL.lower(),
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        "when_ready": when_ready,
+    }
+
+def prepare_metrics_dir():
+    """
+    Workers share Prometheus samples through files in PROMETHEUS_MULTIPROC_DIR.
+    It has to be set before prometheus_client is imported (the app is
+    preloaded) and must not contain files of a previous run.
+    """
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "leipzig-api-metrics")
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def run():
+    options = gunicorn_options()
+    check_process_backends(options["workers"], options["max_requests"])
+    prepare_metrics_dir()
+    ProductionServer(options).run()
+
+
+if __name__ == "__main__":
+    run()
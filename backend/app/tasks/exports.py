@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional
+from app.core.celery import celery_app
+from app.database import SessionLocal
+from app.models.application import Application, ApplicationStatus
+from app.config import settings
+import csv
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = [
+    "id", "application_type", "status", "priority", "email", "first_name",
+    "last_name", "date_of_birth", "nationality", "submitted_at", "updated_at",
+    "estimated_completion", "actual_completion", "case_worker_id", "is_urgent",
+]
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if hasattr(value, "value"):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return value
+
+@celery_app.task
+def export_applications(
+    file_format: str = "csv",
+    status: Optional[str] = None,
+    case_worker_id: Optional[str] = None
+) -> str:
+    """
+    Write applications (optionally filtered) to a CSV or XLSX file in
+    EXPORT_DIR and return its path. Rows are streamed from the database,
+    so memory use does not grow with the table.
+    """
+    if file_format not in ("csv", "xlsx"):
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.EXPORT_DIR,
+        f"applications-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{file_format}"
+    )
+
+    db = SessionLocal()
+    try:
+        columns = [getattr(Application, name) for name in EXPORT_COLUMNS]
+        query = db.query(*columns).order_by(Application.submitted_at)
+        if status:
+            query = query.filter(Application.status == ApplicationStatus(status))
+        if case_worker_id:
+            query = query.filter(Application.case_worker_id == case_worker_id)
+        rows = (tuple(_cell(value) for value in row) for row in query.yield_per(2000))
+
+        if file_format == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(EXPORT_COLUMNS)
+                count = 0
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        else:
+            from openpyxl import Workbook
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet("applications")
+            sheet.append(EXPORT_COLUMNS)
+            count = 0
+            for row in rows:
+                sheet.append(row)
+                count += 1
+            workbook.save(path)
+    finally:
+        db.close()
+
+    logger.info(f"Exported {count} applications to {path}")
+    return path
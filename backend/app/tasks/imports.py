@@ -0,0 +1,82 @@
+from typing import List
+from pydantic import ValidationError
+from app.core.celery import celery_app
+from app.core.events import publish, ApplicationSubmitted
+from app.core import subscribers  # noqa: F401 - writes the initial status history rows
+from app.database import SessionLocal
+from app.models.application import Application
+from app.schemas.application import ApplicationCreate
+from app.utils.helpers import calculate_estimated_completion
+from app.core.application_ids import generate_application_id
+from app.config import settings
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+
+
+@celery_app.task
+def import_applications_csv(path: str) -> dict:
+    """
+    Bulk-import applications from a CSV file using the public field names
+    (type, email, firstName, lastName, birthDate, phone, ...).
+
+    Rows are validated like API submissions and inserted in batches of
+    IMPORT_BATCH_SIZE, one transaction and one event batch per batch.
+    Imported applicants are not emailed.
+    """
+    imported = 0
+    errors: List[dict] = []
+    batch: List[Application] = []
+
+    db = SessionLocal()
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            for line, row in enumerate(csv.DictReader(handle), start=2):
+                try:
+                    application = ApplicationCreate(**{k: v for k, v in row.items() if v not in (None, "")})
+                except ValidationError as e:
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line, "error": str(e.errors()[0].get("msg"))})
+                    continue
+
+                batch.append(Application(
+                    id=generate_application_id(),
+                    application_type=application.application_type,
+                    email=application.email,
+                    first_name=application.first_name,
+                    last_name=application.last_name,
+                    date_of_birth=application.date_of_birth,
+                    phone=application.phone,
+                    nationality=application.nationality,
+                    address=application.address,
+                    language_preference=application.language_preference,
+                    estimated_completion=calculate_estimated_completion(application.application_type)
+                ))
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    imported += _insert_batch(db, batch)
+                    batch = []
+
+        if batch:
+            imported += _insert_batch(db, batch)
+    finally:
+        db.close()
+
+    logger.info(f"Imported {imported} applications from {path} ({len(errors)} rejected rows reported)")
+    return {"imported": imported, "errors": errors}
+
+def _insert_batch(db, batch: List[Application]) -> int:
+    db.add_all(batch)
+    publish(db, *[
+        ApplicationSubmitted(
+            application_id=application.id,
+            email=application.email,
+            language=application.language_preference,
+            notify=False
+        )
+        for application in batch
+    ])
+    db.commit()
+    return len(batch)
@@ -0,0 +1,63 @@
+from datetime import date
+from typing import List, Optional
+from app.core.celery import celery_app
+from app.core.delivery import is_permanent_failure
+from app.utils.email import build_email_message, deliver_message_sync
+from app.config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    bind=True,
+    max_retries=settings.EMAIL_MAX_ATTEMPTS - 1,
+    rate_limit=f"{int(settings.EMAIL_RATE_PER_SECOND * 60)}/m"
+)
+def send_email_task(
+    self,
+    to_email: str,
+    subject: str,
+    body: str,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+    is_html: bool = False,
+    attachments: Optional[List[str]] = None
+) -> bool:
+    """
+    Deliver one email; transient SMTP failures are retried with exponential backoff.
+
+    The body is synchronous so it works in thread-pool workers and when run
+    eagerly from inside a running event loop.
+    """
+    message = build_email_message(
+        to_email, subject, body, from_email, from_name, is_html, attachments
+    )
+    try:
+        deliver_message_sync(message)
+    except Exception as e:
+        if is_permanent_failure(e) or self.request.retries >= self.max_retries:
+            logger.error(f"Email to {to_email} dropped: {str(e)}")
+            return False
+        countdown = min(
+            settings.EMAIL_RETRY_MAX_SECONDS,
+            settings.EMAIL_RETRY_BASE_SECONDS * 2 ** self.request.retries
+        )
+        logger.warning(f"Email to {to_email} failed (attempt {self.request.retries + 1}): {str(e)}; retrying in {countdown:.0f}s")
+        raise self.retry(exc=e, countdown=countdown)
+    return True
+
+@celery_app.task
+def send_daily_summaries_task(day: Optional[str] = None) -> int:
+    """Send the staff daily summaries (scheduled by Celery beat)"""
+    from app.core.delivery import shutdown_delivery_scheduler
+    from app.core.summaries import send_daily_summaries
+
+    async def run_once() -> int:
+        sent = await send_daily_summaries(date.fromisoformat(day) if day else None)
+        # Requeued summaries are retried on this loop; drain it before it closes
+        await shutdown_delivery_scheduler(timeout=settings.EMAIL_RETRY_MAX_SECONDS * 2)
+        return sent
+
+    return asyncio.run(run_once())
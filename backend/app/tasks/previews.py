@@ -0,0 +1,38 @@
+from typing import Optional
+from app.core.celery import celery_app
+from app.config import settings
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+@celery_app.task
+def generate_document_preview(file_path: str) -> Optional[str]:
+    """
+    Render a JPEG thumbnail (at most PREVIEW_MAX_SIZE pixels per side) of an
+    uploaded image into UPLOAD_DIR/previews and return its path. Other file
+    types have no preview and return None.
+    """
+    if not file_path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+
+    from PIL import Image
+
+    preview_dir = os.path.join(settings.UPLOAD_DIR, "previews")
+    os.makedirs(preview_dir, exist_ok=True)
+    preview_path = os.path.join(
+        preview_dir, os.path.splitext(os.path.basename(file_path))[0] + ".jpg"
+    )
+
+    with Image.open(file_path) as image:
+        # draft() lets the JPEG decoder downscale while decoding
+        image.draft("RGB", (settings.PREVIEW_MAX_SIZE, settings.PREVIEW_MAX_SIZE))
+        image = image.convert("RGB")
+        image.thumbnail((settings.PREVIEW_MAX_SIZE, settings.PREVIEW_MAX_SIZE))
+        image.save(preview_path, "JPEG", quality=80, optimize=True)
+
+    logger.info(f"Preview generated for {file_path}")
+    return preview_path
@@ -1,17 +1,237 @@
 import asyncio
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import aiosmtplib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import base64
+import os
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from app.config import settings
 import logging
 
+# The SMTP and MIME stack is imported at first use, not when the app starts
+if TYPE_CHECKING:
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+
 logger = logging.getLogger(__name__)
 
+# Raw bytes per read when encoding; a multiple of 57 keeps base64 lines at 76 chars
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+# (absolute path, inode, mtime_ns, size)
+AttachmentKey = Tuple[str, int, int, int]
+
+class AttachmentCache:
+    """
+    LRU cache of base64-encoded attachment payloads.
+
+    Entries are keyed by path, inode, mtime and size so an edited file is
+    re-encoded automatically, including one atomically replaced by a file
+    of the same size and timestamp. The total encoded size is capped at
+    `max_bytes`.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[AttachmentKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: AttachmentKey) -> Optional[str]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+    
+    def put(self, key: AttachmentKey, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Drop stale versions of the same file
+            for stale_key in [k for k in self._entries if k[0] == key[0]]:
+                self.current_bytes -= len(self._entries.pop(stale_key))
+            self._entries[key] = payload
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+attachment_cache = AttachmentCache(settings.ATTACHMENT_CACHE_MAX_BYTES)
+
+def _encode_file_chunked(file_path: str) -> str:
+    """
+    Base64-encode a file in chunks, so the raw bytes and their encoding are
+    never in memory together. The encoded payload itself is built in full:
+    MIME parts hold a string and the message is serialized whole for SMTP.
+    """
+    chunks = []
+    with open(file_path, "rb") as attachment:
+        while True:
+            chunk = attachment.read(ENCODE_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(base64.encodebytes(chunk).decode("ascii"))
+    return "".join(chunks)
+
+def build_attachment_part(file_path: str) -> "MIMEBase":
+    """
+    Build a base64 MIME part for a file.
+
+    Files up to ATTACHMENT_CACHE_MAX_ITEM_BYTES are encoded once and served
+    from the cache afterwards; larger one-off files are encoded for each
+    message and never cached.
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    if stat.st_size > settings.ATTACHMENT_CACHE_MAX_ITEM_BYTES:
+        payload = _encode_file_chunked(file_path)
+    else:
+        payload = attachment_cache.get(key)
+        if payload is None:
+            payload = _encode_file_chunked(file_path)
+            attachment_cache.put(key, payload)
+    
+    from email.mime.base import MIMEBase
+    
+    part = MIMEBase("application", "octet-stream")
+    part.set_payload(payload)
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header(
+        "Content-Disposition",
+        f"attachment; filename= {Path(file_path).name}",
+    )
+    return part
+
+def build_email_message(
+    to_email: str,
+    subject: str,
+    body: str,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+    is_html: bool = False,
+    attachments: Optional[List[str]] = None
+) -> "MIMEMultipart":
+    """Build a MIME message ready for delivery"""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    
+    # Email configuration
+    from_email = from_email or settings.EMAIL_FROM
+    from_name = from_name or "Leipzig Bürgerbüro"
+    
+    # Create message
+    message = MIMEMultipart()
+    message["From"] = f"{from_name} <{from_email}>"
+    message["To"] = to_email
+    message["Subject"] = subject
+    
+    # Add body
+    body_type = "html" if is_html else "plain"
+    message.attach(MIMEText(body, body_type, "utf-8"))
+    
+    # Add attachments if any
+    if attachments:
+        for file_path in attachments:
+            if Path(file_path).exists():
+                message.attach(build_attachment_part(file_path))
+    
+    return message
+
+async def deliver_message(message: "MIMEMultipart"):
+    """Hand a built message to the SMTP relay (raises on failure)"""
+    import aiosmtplib
+    
+    await aiosmtplib.send(
+        message,
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        start_tls=settings.SMTP_USE_TLS,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+    )
+
+def deliver_message_sync(message: "MIMEMultipart"):
+    """Blocking variant of deliver_message for worker processes without an event loop"""
+    import smtplib
+    
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+        if settings.SMTP_USE_TLS:
+            server.starttls()
+        if settings.SMTP_USER:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.send_message(message)
+
+@dataclass
+class BulkSendResult:
+    """Outcome of send_bulk_messages: what the relay accepted and what it did not"""
+    sent: int = 0
+    failed: List[Tuple["MIMEMultipart", Exception]] = field(default_factory=list)
+
+async def send_bulk_messages(messages: List["MIMEMultipart"]) -> BulkSendResult:
+    """
+    Send many messages over a single SMTP connection.
+
+    A dropped connection is re-established and the message retried once;
+    any other failure (or a failed reconnect) is recorded for that message
+    and the batch carries on. Callers decide what to retry from `failed`.
+    """
+    import aiosmtplib
+    
+    result = BulkSendResult()
+    smtp = aiosmtplib.SMTP(
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        start_tls=settings.SMTP_USE_TLS,
+    )
+    
+    async def connect():
+        if smtp.is_connected:
+            smtp.close()
+        await smtp.connect()
+        if settings.SMTP_USER:
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+    
+    async def send(message: "MIMEMultipart"):
+        if not smtp.is_connected:
+            await connect()
+        try:
+            await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            await connect()
+            await smtp.send_message(message)
+    
+    try:
+        for message in messages:
+            try:
+                await send(message)
+                result.sent += 1
+            except Exception as e:
+                logger.error(f"Failed to send email to {message['To']}: {str(e)}")
+                result.failed.append((message, e))
+    finally:
+        if smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+    
+    logger.info(f"Sent {result.sent}/{len(messages)} emails over a pooled connection")
+    return result
+
 async def send_email(
     to_email: str,
     subject: str,
@@ -23,43 +243,12 @@ async def send_email(
 ) -> bool:
     """Send email using async SMTP"""
     try:
-        # Email configuration
-        from_email = from_email or settings.EMAIL_FROM
-        from_name = from_name or "Leipzig Bürgerbüro"
-        
-        # Create message
-        message = MIMEMultipart()
-        message["From"] = f"{from_name} <{from_email}>"
-        message["To"] = to_email
-        message["Subject"] = subject
-        
-        # Add body
-        body_type = "html" if is_html else "plain"
-        message.attach(MIMEText(body, body_type, "utf-8"))
-        
-        # Add attachments if any
-        if attachments:
-            for file_path in attachments:
-                if Path(file_path).exists():
-                    with open(file_path, "rb") as attachment:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(attachment.read())
-                        encoders.encode_base64(part)
-                        part.add_header(
-                            "Content-Disposition",
-                            f"attachment; filename= {Path(file_path).name}",
-                        )
-                        message.attach(part)
+        message = build_email_message(
+            to_email, subject, body, from_email, from_name, is_html, attachments
+        )
         
         # Send email
-        await aiosmtplib.send(
-            message,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            start_tls=True,
-            username=settings.SMTP_USERNAME,
-            password=settings.SMTP_PASSWORD,
-        )
+        await deliver_message(message)
         
         logger.info(f"Email sent successfully to {to_email}")
         return True
@@ -79,39 +268,12 @@ def send_email_sync(
 ) -> bool:
     """Send email using synchronous SMTP"""
     try:
-        # Email configuration
-        from_email = from_email or settings.EMAIL_FROM
-        from_name = from_name or "Leipzig Bürgerbüro"
-        
-        # Create message
-        message = MIMEMultipart()
-        message["From"] = f"{from_name} <{from_email}>"
-        message["To"] = to_email
-        message["Subject"] = subject
-        
-        # Add body
-        body_type = "html" if is_html else "plain"
-        message.attach(MIMEText(body, body_type, "utf-8"))
-        
-        # Add attachments if any
-        if attachments:
-            for file_path in attachments:
-                if Path(file_path).exists():
-                    with open(file_path, "rb") as attachment:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(attachment.read())
-                        encoders.encode_base64(part)
-                        part.add_header(
-                            "Content-Disposition",
-                            f"attachment; filename= {Path(file_path).name}",
-                        )
-                        message.attach(part)
+        message = build_email_message(
+            to_email, subject, body, from_email, from_name, is_html, attachments
+        )
         
         # Send email
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(message)
+        deliver_message_sync(message)
         
         logger.info(f"Email sent successfully to {to_email}")
         return True
@@ -192,12 +354,8 @@ Dies ist eine automatisch generierte E-Mail.
         body=body
     )
 
-async def send_daily_summary_email(
-    email: str,
-    name: str,
-    summary_data: dict
-) -> bool:
-    """Send daily summary email to staff"""
+def render_daily_summary_email(name: str, summary_data: dict) -> Tuple[str, str]:
+    """Render subject and body of the daily staff summary"""
     subject = f"Tagesübersicht - {summary_data.get('date', 'Heute')}"
     
     body = f"""
@@ -227,6 +385,16 @@ Ihr Leipzig Bürgerbüro System
 Dies ist eine automatisch generierte E-Mail.
     """
     
+    return subject, body
+
+async def send_daily_summary_email(
+    email: str,
+    name: str,
+    summary_data: dict
+) -> bool:
+    """Send daily summary email to staff"""
+    subject, body = render_daily_summary_email(name, summary_data)
+    
     return await send_email(
         to_email=email,
         subject=subject,
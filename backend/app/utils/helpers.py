@@ -1,27 +1,22 @@
 # app/utils/helpers.py
 from datetime import datetime, timedelta
 from app.models.application import ApplicationType, ApplicationStatus
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+import ipaddress
 import logging
 import uuid
-import random
 import string
 import secrets
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.application import Message, Staff
+from app.config import settings
 
 
 logger = logging.getLogger(__name__)
 
-def generate_application_id() -> str:
-    """Generate a unique application ID"""
-    # Format: LB-YYYY-XXXXXX (LB = Leipzig Bürgerbüro)
-    year = datetime.now().year
-    random_part = ''.join(random.choices(string.digits, k=6))
-    return f"LB-{year}-{random_part}"
-
 def calculate_estimated_completion(application_type) -> datetime:
     """
     Calculate estimated completion date based on application type
@@ -122,13 +117,13 @@ def calculate_estimated_completion(application_type) -> datetime:
 def calculate_progress_percentage(status: ApplicationStatus) -> int:
     """Calculate progress percentage based on application status."""
     status_progress = {
-        ApplicationStatus.DRAFT: 0,
-        ApplicationStatus.SUBMITTED: 10,
-        ApplicationStatus.UNDER_REVIEW: 30,
-        ApplicationStatus.APPROVED: 100,
-        ApplicationStatus.REJECTED: 0,
-        ApplicationStatus.PENDING_DOCUMENTS: 50,
-        ApplicationStatus.CANCELLED: 0
+        ApplicationStatus.EINGEGANGEN: 10,
+        ApplicationStatus.IN_BEARBEITUNG: 30,
+        ApplicationStatus.NACHFRAGE: 45,
+        ApplicationStatus.PRUEFUNG: 70,
+        ApplicationStatus.ENTSCHEIDUNG: 85,
+        ApplicationStatus.ABGESCHLOSSEN: 100,
+        ApplicationStatus.ABGELEHNT: 100,
     }
     return status_progress.get(status, 0)
 
@@ -238,11 +233,6 @@ def generate_password(length: int = 12, include_symbols: bool = True) -> str:
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 
-def generate_application_id() -> str:
-    """Generate a unique application ID with prefix."""
-    return f"APP-{uuid.uuid4().hex[:8].upper()}"
-
-
 def format_datetime(dt: datetime, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
     """Format datetime object to string."""
     if not dt:
@@ -423,20 +413,55 @@ def format_file_size(size_bytes: int) -> str:
         return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
 
 
+@lru_cache(maxsize=8)
+def _trusted_networks(trusted_proxies: str) -> Tuple:
+    networks = []
+    for entry in trusted_proxies.split(","):
+        entry = entry.strip()
+        if entry:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+    return tuple(networks)
+
+
+def is_trusted_proxy(host: Optional[str]) -> bool:
+    """Whether `host` is one of the TRUSTED_PROXIES addresses or networks"""
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks(settings.TRUSTED_PROXIES))
+
+
 def get_client_ip(request) -> str:
-    """Get client IP address from request."""
-    # Check for forwarded IP first (if behind proxy)
-    forwarded_ip = request.headers.get('X-Forwarded-For')
-    if forwarded_ip:
-        return forwarded_ip.split(',')[0].strip()
+    """
+    Get client IP address from request.
+
+    Forwarding headers are only honoured when the connection comes from a
+    trusted proxy. X-Forwarded-For is read from the right: each trusted
+    proxy appends the address it received the request from, so the
+    right-most untrusted hop is the client and anything to its left is
+    whatever the client chose to send.
+    """
+    peer = request.client.host if request.client else None
+    if not is_trusted_proxy(peer):
+        return peer or 'unknown'
+    
+    forwarded_for = request.headers.get('X-Forwarded-For')
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        for hop in reversed(hops):
+            if not is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
     
-    # Check for real IP header
     real_ip = request.headers.get('X-Real-IP')
     if real_ip:
-        return real_ip
+        return real_ip.strip()
     
-    # Fall back to remote address
-    return request.remote_addr or 'unknown'
+    return peer
 
 
 def generate_otp(length: int = 6) -> str:
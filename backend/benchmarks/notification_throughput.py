@@ -0,0 +1,193 @@
+"""
+Notification throughput benchmark.
+
+Starts a local aiosmtpd sink and fires N status notifications through
+send_status_notification -> delivery scheduler -> SMTP, spread across the
+three supported languages. Reports emails/sec, end-to-end latency
+percentiles and event-loop lag.
+
+Usage (from backend/):
+    python -m benchmarks.notification_throughput -n 2000 --json result.json
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("APPLICATION_ID_SCRAMBLE_KEY", "benchmark-scramble-key")
+
+import argparse
+import asyncio
+import email
+import email.policy
+import json
+import logging
+import socket
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+from aiosmtpd.controller import Controller
+
+from app.config import settings
+from app.models.application import ApplicationStatus
+
+LANGUAGES = ["de", "en", "ar"]
+STATUSES = [
+    ApplicationStatus.IN_BEARBEITUNG,
+    ApplicationStatus.NACHFRAGE,
+    ApplicationStatus.PRUEFUNG,
+    ApplicationStatus.ENTSCHEIDUNG,
+    ApplicationStatus.ABGESCHLOSSEN,
+]
+
+
+class SinkHandler:
+    """aiosmtpd handler recording when each application's email arrives"""
+
+    def __init__(self):
+        self.received: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.expected = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        arrived = time.perf_counter()
+        message = email.message_from_bytes(envelope.content, policy=email.policy.default)
+        application_id = str(message["Subject"]).rsplit(" - ", 1)[-1].strip()
+        with self.lock:
+            self.received[application_id] = arrived
+            if len(self.received) >= self.expected:
+                self.done.set()
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.005):
+    """Record how late the loop wakes up from a short sleep"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_benchmark(count: int, fire_rate: float, timeout: float) -> dict:
+    from app.core.notifications import send_status_notification
+    from app.core.delivery import get_delivery_scheduler, shutdown_delivery_scheduler
+
+    handler = SinkHandler()
+    handler.expected = count
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    settings.SMTP_HOST = "127.0.0.1"
+    settings.SMTP_PORT = port
+    settings.SMTP_USE_TLS = False
+    settings.SMTP_USER = None
+    settings.NOTIFICATION_COALESCE_MINUTES = 0
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+
+    submitted: Dict[str, float] = {}
+    started = time.perf_counter()
+    for i in range(count):
+        application_id = f"LB-BENCH-{i:07d}"
+        submitted[application_id] = time.perf_counter()
+        await send_status_notification(
+            f"citizen{i}@example.org",
+            application_id,
+            STATUSES[i % len(STATUSES)],
+            f"Benchmark message {i}",
+            LANGUAGES[i % len(LANGUAGES)]
+        )
+        if fire_rate:
+            await asyncio.sleep(1 / fire_rate)
+    fired = time.perf_counter()
+
+    deadline = time.monotonic() + timeout
+    while not handler.done.is_set() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    finished = time.perf_counter()
+
+    stop.set()
+    await lag_task
+    scheduler_stats = get_delivery_scheduler().stats()
+    await shutdown_delivery_scheduler(timeout=1.0)
+    controller.stop()
+
+    latencies = [
+        (handler.received[app_id] - sent_at) * 1000
+        for app_id, sent_at in submitted.items()
+        if app_id in handler.received
+    ]
+    delivered = len(latencies)
+    elapsed = (max(handler.received.values()) if delivered else finished) - started
+    lag_ms = [sample * 1000 for sample in lag_samples]
+
+    return {
+        "notifications": count,
+        "delivered": delivered,
+        "email_rate_limit": settings.EMAIL_RATE_PER_SECOND,
+        "fire_seconds": round(fired - started, 4),
+        "elapsed_seconds": round(elapsed, 4),
+        "emails_per_second": round(delivered / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        },
+        "loop_lag_ms": {
+            "p50": round(percentile(lag_ms, 50), 3),
+            "p99": round(percentile(lag_ms, 99), 3),
+            "max": round(max(lag_ms), 3) if lag_ms else 0.0,
+        },
+        "scheduler": scheduler_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status notification throughput benchmark")
+    parser.add_argument("-n", "--count", type=int, default=500, help="notifications to send")
+    parser.add_argument("--rate-limit", type=float, default=10000.0,
+                        help="EMAIL_RATE_PER_SECOND for the run (default effectively unlimited)")
+    parser.add_argument("--concurrency", type=int, default=settings.EMAIL_MAX_CONCURRENCY,
+                        help="EMAIL_MAX_CONCURRENCY for the run")
+    parser.add_argument("--fire-rate", type=float, default=0.0,
+                        help="notifications fired per second (0 = as fast as possible)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="write the result to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    settings.EMAIL_RATE_PER_SECOND = args.rate_limit
+    settings.EMAIL_BURST = max(1, int(args.rate_limit))
+    settings.EMAIL_MAX_CONCURRENCY = args.concurrency
+
+    result = asyncio.run(run_benchmark(args.count, args.fire_rate, args.timeout))
+
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
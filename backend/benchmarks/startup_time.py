@@ -0,0 +1,119 @@
+"""
+Cold-start import benchmark.
+
+Imports a module (app.main by default) in fresh interpreters with
+`python -X importtime`, parses the per-module timings and reports the
+total import time, the slowest modules and the cost per top-level
+package. Also lists heavy optional modules that were imported although
+they should only load at first use.
+
+Usage (from backend/):
+    python -m benchmarks.startup_time --runs 5 --top 15
+    python -m benchmarks.startup_time --budget-ms 2000   # exit 1 if over budget
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List
+
+# Must not be imported by `import app.main`; they load at first use
+LAZY_MODULES = ["aiosmtplib", "smtplib", "email.mime", "celery", "redis", "pandas", "openpyxl", "PIL", "gunicorn"]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse `-X importtime` lines: 'import time: self [us] | cumulative | imported package'"""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+def run_once(module: str) -> List[ImportTiming]:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    env.setdefault("DEBUG", "false")
+    env.setdefault("APPLICATION_ID_SCRAMBLE_KEY", "benchmark-scramble-key")
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def measure(module: str = "app.main", runs: int = 3, top: int = 15) -> dict:
+    """Median total import time over `runs` cold interpreters plus a breakdown of the median run"""
+    samples = []
+    for _ in range(runs):
+        timings = run_once(module)
+        total = next(t.cumulative_us for t in reversed(timings) if t.module == module)
+        samples.append((total, timings))
+    samples.sort(key=lambda sample: sample[0])
+    total_us, timings = samples[len(samples) // 2]
+
+    by_package: Dict[str, int] = {}
+    for timing in timings:
+        package = timing.module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + timing.self_us
+
+    imported = {timing.module for timing in timings}
+    eager_heavy = sorted(
+        name for name in LAZY_MODULES
+        if any(m == name or m.startswith(name + ".") for m in imported)
+    )
+
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms": round(total_us / 1000, 1),
+        "samples_ms": [round(sample[0] / 1000, 1) for sample in samples],
+        "modules_imported": len(timings),
+        "slowest_modules_ms": [
+            {"module": t.module, "cumulative_ms": round(t.cumulative_us / 1000, 1), "self_ms": round(t.self_us / 1000, 1)}
+            for t in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]
+        ],
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "eager_heavy_modules": eager_heavy,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    report = measure(args.module, args.runs, args.top)
+    print(json.dumps(report, indent=2))
+
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"Import time {report['total_ms']} ms exceeds budget of {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
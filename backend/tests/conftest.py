@@ -0,0 +1,107 @@
+import os
+import socket
+import tempfile
+
+# Settings are read at import time, so configure them before any app module loads
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("APPLICATION_ID_SCRAMBLE_KEY", "test-scramble-key")
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.config import settings
+
+
+class RecordingHandler:
+    """aiosmtpd handler keeping every received envelope"""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    """Local SMTP server the app is pointed at for the duration of a test"""
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", None)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app  # creates the tables
+    return app
+
+
+@pytest.fixture
+def client(app, smtp_sink, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core import delivery
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(delivery, "_scheduler", None)
+    with TestClient(app, base_url="http://localhost") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(app):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def supervisor(db):
+    from app.core.security import create_access_token, get_password_hash
+    from app.models.user import User, UserRole
+
+    user = db.query(User).filter(User.username == "supervisor").first()
+    if user is None:
+        user = User(
+            id="supervisor-1",
+            username="supervisor",
+            email="supervisor@example.org",
+            hashed_password=get_password_hash("supervisor-password"),
+            first_name="Sandra",
+            last_name="Supervisor",
+            role=UserRole.SUPERVISOR,
+        )
+        db.add(user)
+        db.commit()
+    return {"user": user, "headers": {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}}
+
+
+@pytest.fixture
+def submitted_application(client):
+    response = client.post("/api/v1/applications/", json={
+        "type": "anmeldung",
+        "email": "citizen@example.org",
+        "firstName": "Alex",
+        "lastName": "Müller",
+        "birthDate": "1990-04-01",
+        "phone": "+49 341 000000",
+        "languagePreference": "de",
+    })
+    assert response.status_code == 200, response.text
+    return {"id": response.json()["id"], "birthDate": "1990-04-01"}
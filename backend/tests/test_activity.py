@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import activity
+from app.core.activity import ActivityBuffer
+from app.core.security import get_password_hash
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def staff_ids(db):
+    ids = []
+    for n in range(2):
+        user_id = f"activity-{n}"
+        if db.get(User, user_id) is None:
+            db.add(User(
+                id=user_id,
+                username=f"activity{n}",
+                email=f"activity{n}@example.org",
+                hashed_password=get_password_hash("activity-password"),
+                first_name="Active",
+                last_name=f"User{n}",
+                role=UserRole.STAFF,
+            ))
+        ids.append(user_id)
+    db.commit()
+    return ids
+
+
+def test_repeated_activity_collapses_into_one_row_per_user():
+    buffer = ActivityBuffer()
+    start = datetime(2026, 10, 19, 9, 0)
+    buffer.record("a", at=start, login=True)
+    for minute in range(1, 50):
+        buffer.record("a", at=start + timedelta(minutes=minute))
+    buffer.record("b", at=start)
+
+    assert len(buffer) == 2
+    # Later plain activity keeps the login time recorded before it
+    assert buffer._pending["a"] == {
+        "id": "a", "last_login": start, "last_activity": start + timedelta(minutes=49),
+    }
+    assert "last_login" not in buffer._pending["b"]
+
+
+def test_flush_writes_pending_timestamps(db, staff_ids):
+    buffer = ActivityBuffer()
+    login_at, seen_at = datetime(2026, 10, 19, 8, 0), datetime(2026, 10, 19, 8, 30)
+    buffer.record(staff_ids[0], at=login_at, login=True)
+    buffer.record(staff_ids[0], at=seen_at)
+    buffer.record(staff_ids[1], at=seen_at)
+
+    assert buffer.flush() == 2
+    assert len(buffer) == 0 and buffer.flush() == 0
+
+    db.expire_all()
+    first, second = db.get(User, staff_ids[0]), db.get(User, staff_ids[1])
+    assert (first.last_login, first.last_activity) == (login_at, seen_at)
+    assert second.last_activity == seen_at
+
+
+def test_failed_flush_keeps_timestamps_without_overwriting_newer_ones(staff_ids, monkeypatch):
+    buffer = ActivityBuffer()
+    old, new = datetime(2026, 10, 19, 8, 0), datetime(2026, 10, 19, 9, 0)
+    buffer.record(staff_ids[0], at=old)
+    buffer.record(staff_ids[1], at=old)
+
+    class BrokenSession:
+        def execute(self, *args):
+            # Activity arriving while the flush is in progress
+            buffer.record(staff_ids[0], at=new)
+            raise RuntimeError("database unavailable")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(activity, "SessionLocal", BrokenSession)
+    assert buffer.flush() == 0
+
+    assert buffer._pending[staff_ids[0]]["last_activity"] == new
+    assert buffer._pending[staff_ids[1]]["last_activity"] == old
+    assert buffer.flushed_rows == 0
@@ -0,0 +1,118 @@
+import random
+import threading
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
+
+from app.config import DEVELOPMENT_SCRAMBLE_KEY, Settings
+from app.core.application_ids import (
+    NUMBER_SPACE,
+    ApplicationIdGenerator,
+    format_application_id,
+    is_valid_application_id,
+    scramble,
+    unscramble,
+)
+from app.database import engine
+
+KEY = b"test-scramble-key"
+
+
+def test_feistel_round_trip():
+    rng = random.Random(7)
+    counters = [0, 1, 9_999, 10_000, NUMBER_SPACE - 1] + [rng.randrange(NUMBER_SPACE) for _ in range(5_000)]
+    for counter in counters:
+        number = scramble(counter, KEY)
+        assert 0 <= number < NUMBER_SPACE
+        assert unscramble(number, KEY) == counter
+
+
+def test_first_200k_counters_map_to_distinct_numbers():
+    numbers = {scramble(counter, KEY) for counter in range(200_000)}
+    assert len(numbers) == 200_000
+    # Scrambled, not just offset: consecutive counters do not give neighbouring numbers
+    assert sum(abs(scramble(c + 1, KEY) - scramble(c, KEY)) < 1000 for c in range(1000)) < 10
+
+
+def test_damm_check_digit_catches_typos_and_adjacent_swaps():
+    for counter in (0, 42, 123_456, 99_999_999):
+        application_id = format_application_id(2026, counter, KEY)
+        assert is_valid_application_id(application_id)
+        digit_positions = [i for i, ch in enumerate(application_id) if ch.isdigit()]
+
+        for i in digit_positions:
+            for digit in "0123456789":
+                if digit != application_id[i]:
+                    typo = application_id[:i] + digit + application_id[i + 1:]
+                    assert not is_valid_application_id(typo), typo
+
+        for i, j in zip(digit_positions, digit_positions[1:]):
+            if application_id[i] != application_id[j]:
+                swapped = list(application_id)
+                swapped[i], swapped[j] = swapped[j], swapped[i]
+                assert not is_valid_application_id("".join(swapped))
+
+
+def test_concurrent_block_reservations_do_not_overlap(app):
+    year, block_size, rounds = 2101, 50, 5
+    blocks = []
+    lock = threading.Lock()
+
+    def reserve():
+        generator = ApplicationIdGenerator(block_size, KEY.decode())
+        for _ in range(rounds):
+            generator._reserve_block(year)
+            with lock:
+                blocks.append((generator._next, generator._end))
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    blocks.sort()
+    assert blocks == [(n * block_size, (n + 1) * block_size) for n in range(8 * rounds)]
+
+
+def test_reserve_block_retries_after_losing_the_insert_race(app):
+    # Another process inserts this year's row between our UPDATE (no row yet) and our INSERT
+    year, block_size = 2102, 100
+    statements = []
+    rivals = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn in rivals or not statement.lstrip().startswith(("UPDATE id_sequences", "INSERT INTO id_sequences")):
+            return statement, parameters
+        statements.append(statement.split()[0])
+        if statements == ["UPDATE", "INSERT"]:
+            # SQLite locks out the rival here, so let the INSERT collide with itself instead
+            return statement + ", (?, ?)", tuple(parameters) * 2
+        if statements == ["UPDATE", "INSERT", "UPDATE"]:
+            # The failed transaction is rolled back; the rival's row is committed now
+            with engine.begin() as rival:
+                rivals.append(rival)
+                rival.exec_driver_sql(
+                    "INSERT INTO id_sequences (name, next_value) VALUES (?, ?)",
+                    (f"application-{year}", block_size),
+                )
+        return statement, parameters
+
+    event.listen(engine, "before_cursor_execute", before_execute, retval=True)
+    try:
+        generator = ApplicationIdGenerator(block_size, KEY.decode())
+        generator._reserve_block(year)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert statements == ["UPDATE", "INSERT", "UPDATE"]
+    assert (generator._next, generator._end) == (block_size, 2 * block_size)
+
+
+def test_scramble_key_is_required_without_debug():
+    with pytest.raises(ValidationError, match="APPLICATION_ID_SCRAMBLE_KEY"):
+        Settings(_env_file=None, SECRET_KEY="x", DEBUG=False, APPLICATION_ID_SCRAMBLE_KEY=None)
+
+    development = Settings(_env_file=None, SECRET_KEY="x", DEBUG=True, APPLICATION_ID_SCRAMBLE_KEY=None)
+    assert development.APPLICATION_ID_SCRAMBLE_KEY == DEVELOPMENT_SCRAMBLE_KEY
@@ -0,0 +1,82 @@
+from app.core import events
+from app.models.application import Document
+
+
+def test_upload_saves_document_before_announcing_it(client, db, submitted_application, monkeypatch):
+    announced = []
+
+    async def record(batch):
+        # The row must be visible once the event is delivered
+        announced.extend((e, db.query(Document).filter(Document.application_id == e.application_id).count()) for e in batch)
+
+    monkeypatch.setitem(events.event_bus._after_commit, events.DocumentUploaded, [record])
+
+    response = client.post(
+        f"/api/v1/applications/{submitted_application['id']}/upload-document",
+        params={"date_of_birth": submitted_application["birthDate"]},
+        files={"file": ("pass.pdf", b"%PDF-1.4 test", "application/pdf")},
+    )
+
+    assert response.status_code == 200, response.text
+    document = db.get(Document, response.json()["document_id"])
+    assert document.original_filename == "pass.pdf"
+    assert open(document.file_path, "rb").read() == b"%PDF-1.4 test"
+    assert [(e.filename, e.size, rows) for e, rows in announced] == [("pass.pdf", 13, 1)]
+
+    listed = client.get(
+        f"/api/v1/applications/{submitted_application['id']}/documents",
+        params={"date_of_birth": submitted_application["birthDate"]},
+    ).json()["documents"]
+    assert [d["filename"] for d in listed] == ["pass.pdf"]
+
+
+def test_rejected_upload_announces_nothing(client, submitted_application, monkeypatch):
+    announced = []
+
+    async def record(batch):
+        announced.extend(batch)
+
+    monkeypatch.setitem(events.event_bus._after_commit, events.DocumentUploaded, [record])
+
+    response = client.post(
+        f"/api/v1/applications/{submitted_application['id']}/upload-document",
+        params={"date_of_birth": submitted_application["birthDate"]},
+        files={"file": ("script.exe", b"MZ", "application/octet-stream")},
+    )
+
+    assert response.status_code == 400
+    assert announced == []
+
+
+def check_status(client, application, **headers):
+    return client.get(
+        "/api/v1/applications/check-status",
+        params={"application_id": application["id"], "date_of_birth": application["birthDate"]},
+        headers=headers,
+    )
+
+
+def test_non_ascii_date_of_birth_is_a_plain_mismatch(client, submitted_application):
+    check_status(client, submitted_application)  # cache the response
+    response = check_status(client, {**submitted_application, "birthDate": "1990-04-0ü"})
+    assert response.status_code == 404
+
+
+def test_etag_changes_with_every_status_change(client, db, supervisor, submitted_application):
+    first = check_status(client, submitted_application)
+    assert first.json()["status"] == "eingegangen"
+    assert check_status(client, submitted_application, **{"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    etags = {first.headers["etag"]}
+    for new_status in ("in_bearbeitung", "nachfrage"):
+        # Both changes land within the same second
+        client.post(
+            f"/api/v1/staff/applications/{submitted_application['id']}/status",
+            json={"application_id": submitted_application["id"], "new_status": new_status, "message": "update"},
+            headers=supervisor["headers"],
+        )
+        response = check_status(client, submitted_application, **{"If-None-Match": first.headers["etag"]})
+        assert response.status_code == 200
+        assert response.json()["status"] == new_status
+        etags.add(response.headers["etag"])
+    assert len(etags) == 3
@@ -0,0 +1,55 @@
+import base64
+import os
+
+import pytest
+
+from app.config import settings
+from app.utils import email as email_utils
+from app.utils.email import AttachmentCache, build_attachment_part
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AttachmentCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(email_utils, "attachment_cache", cache)
+    return cache
+
+
+def decoded(part) -> bytes:
+    return base64.b64decode(part.get_payload())
+
+
+def test_encoded_once_then_served_from_cache(cache, tmp_path):
+    path = tmp_path / "bescheid.pdf"
+    path.write_bytes(os.urandom(200_000))
+
+    first, second = build_attachment_part(str(path)), build_attachment_part(str(path))
+
+    assert decoded(first) == decoded(second) == path.read_bytes()
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_replaced_file_with_same_size_and_mtime_is_re_encoded(cache, tmp_path):
+    path = tmp_path / "bescheid.pdf"
+    path.write_bytes(b"A" * 1000)
+    stat = os.stat(path)
+    build_attachment_part(str(path))
+
+    # Atomic replace keeping size and timestamps: only the inode differs
+    replacement = tmp_path / "bescheid.pdf.tmp"
+    replacement.write_bytes(b"B" * 1000)
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, path)
+
+    assert decoded(build_attachment_part(str(path))) == b"B" * 1000
+    assert cache.misses == 2
+    assert len(cache._entries) == 1  # the stale version was dropped
+
+
+def test_large_files_are_not_cached(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ATTACHMENT_CACHE_MAX_ITEM_BYTES", 1000)
+    path = tmp_path / "scan.png"
+    path.write_bytes(os.urandom(5000))
+
+    assert decoded(build_attachment_part(str(path))) == path.read_bytes()
+    assert len(cache._entries) == 0
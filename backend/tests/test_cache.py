@@ -0,0 +1,171 @@
+import asyncio
+import pickle
+import threading
+
+import fakeredis
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import Cache, CacheBackend, InMemoryCacheBackend, RedisCacheBackend, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_ttl_cache_expires_entries(clock):
+    ttl_cache = TTLCache(max_size=10, ttl=5)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=20)
+
+    clock[0] += 4.9
+    assert ttl_cache.get("a") == 1
+    clock[0] += 0.1
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.get("b") == 2
+    assert ttl_cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    ttl_cache = TTLCache(max_size=2, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+    assert (ttl_cache.get("a"), ttl_cache.get("b"), ttl_cache.get("c")) == (1, None, 3)
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "memory":
+        backend = InMemoryCacheBackend(max_size=100)
+    else:
+        backend = RedisCacheBackend(fakeredis.FakeRedis())
+    return Cache("test", backend, ttl=60)
+
+
+def test_delete_and_tag_invalidation(cache):
+    cache.set("one", {"n": 1}, tags=["summaries"])
+    cache.set("two", {"n": 2}, tags=["summaries"])
+    cache.set("three", {"n": 3})
+
+    cache.delete("three")
+    cache.invalidate_tag("summaries")
+
+    assert [cache.get(key) for key in ("one", "two", "three")] == [None, None, None]
+
+
+def test_get_or_set_loads_once_under_concurrency(cache):
+    calls = []
+    started = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        return {"total": 42}
+
+    def worker(results):
+        started.wait()
+        results.append(cache.get_or_set("summary", loader))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"total": 42}] * 8
+    assert len(calls) == 1
+
+
+def test_async_get_or_set_keeps_blocking_work_off_the_loop(cache):
+    loop_thread = []
+
+    def loader():
+        loop_thread.append(threading.get_ident())
+        return "value"
+
+    async def scenario():
+        value = await cache.aget_or_set("key", loader)
+        return value, threading.get_ident(), await cache.aget("key")
+
+    value, loop_ident, cached = asyncio.run(scenario())
+    assert (value, cached) == ("value", "value")
+    assert loop_thread != [loop_ident]
+
+
+def test_redis_entries_are_signed():
+    client = fakeredis.FakeRedis()
+    cache = Cache("test", RedisCacheBackend(client), ttl=60)
+    cache.set("principal", {"role": "admin"})
+    assert cache.get("principal") == {"role": "admin"}
+
+    # A value written by someone without the secret is ignored, not unpickled
+    client.set(cache._key("principal"), pickle.dumps({"role": "admin"}))
+    assert cache.get("principal") is None
+
+
+def test_redis_errors_read_as_misses():
+    server = fakeredis.FakeServer()
+    cache = Cache("test", RedisCacheBackend(fakeredis.FakeRedis(server=server)), ttl=60)
+    cache.set("key", 1)
+    server.connected = False
+    assert cache.get("key") is None
+    assert cache.backend.stats()["errors"] == 1
+
+
+def test_async_invalidation_is_done_when_awaited(cache):
+    cache.set("key", 1, tags=["summaries"])
+    cache.set("other", 2, tags=["summaries"])
+
+    async def invalidate():
+        await cache.adelete("key")
+        assert cache.get("key") is None
+        await cache.ainvalidate_tag("summaries")
+        assert cache.get("other") is None
+
+    asyncio.run(invalidate())
+
+
+@pytest.fixture
+def cached_supervisor(supervisor, db):
+    from app.core.user_cache import cache_user, principal_cache
+
+    cache_user(supervisor["user"])
+    yield supervisor["user"]
+    principal_cache.delete(supervisor["user"].username)
+
+
+def test_principal_is_evicted_on_commit_not_on_assignment(cached_supervisor, db):
+    from app.core.user_cache import principal_cache
+    from app.models.user import UserStatus
+
+    user = db.merge(cached_supervisor)
+    user.status = UserStatus.INACTIVE
+    # Not committed yet: a concurrent request may still use (and re-cache) the old row
+    assert principal_cache.get(user.username) is not None
+
+    db.commit()
+    assert principal_cache.get(user.username) is None
+    user.status = UserStatus.ACTIVE
+    db.commit()
+
+
+def test_rolled_back_changes_keep_the_cached_principal(cached_supervisor, db):
+    from app.core.user_cache import principal_cache
+    from app.models.user import UserRole
+
+    user = db.merge(cached_supervisor)
+    user.role = UserRole.STAFF
+    db.rollback()
+
+    assert principal_cache.get(user.username) is not None
+    assert "stale_principals" not in db.info
@@ -0,0 +1,153 @@
+"""Circuit breaker, token bucket and DeliveryScheduler retries without an SMTP relay"""
+import asyncio
+from types import SimpleNamespace
+
+import aiosmtplib
+import pytest
+
+from app.core import delivery
+from app.core.delivery import CircuitBreaker, DeliveryScheduler, TokenBucket
+from app.utils.email import build_email_message
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(delivery, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_breaker_opens_after_threshold_and_probes_once_when_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    clock.now += 10
+    assert breaker.seconds_until_retry() == pytest.approx(20)
+
+    clock.now += 20
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+    assert breaker.record_success() is True
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.seconds_until_retry() == pytest.approx(5)
+    assert not breaker.allow_request()
+
+
+def test_token_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire()
+
+    asyncio.run(take(4))
+    assert bucket.tokens == pytest.approx(0)
+
+    clock.now += 1
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(2)
+
+    clock.now += 60
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(4)
+
+    bucket.drain()
+    assert bucket.tokens == 0
+
+
+class FlakyRelay:
+    """send_func failing each recipient with the given errors before accepting it"""
+
+    def __init__(self, errors):
+        self.errors = {to: list(errs) for to, errs in errors.items()}
+        self.delivered = []
+
+    async def __call__(self, message):
+        pending = self.errors.get(message["To"])
+        if pending:
+            raise pending.pop(0)
+        self.delivered.append(message["To"])
+
+
+def run_scheduler(relay, recipients, **kwargs):
+    async def run():
+        scheduler = DeliveryScheduler(
+            send_func=relay, rate=1000, burst=100, backoff_base=0.01, backoff_max=0.02, **kwargs
+        )
+        for to in recipients:
+            scheduler.submit(build_email_message(to, "Status", "Hallo"))
+        await scheduler.stop(timeout=5)
+        return scheduler
+
+    return asyncio.run(run())
+
+
+def test_scheduler_retries_transient_failures():
+    relay = FlakyRelay({"b@example.org": [aiosmtplib.SMTPServerDisconnected("gone")] * 2})
+
+    scheduler = run_scheduler(relay, ["a@example.org", "b@example.org"], max_attempts=3)
+
+    assert sorted(relay.delivered) == ["a@example.org", "b@example.org"]
+    assert scheduler.stats()["sent"] == 2
+    assert scheduler.stats()["retries"] == 2
+    assert not scheduler.dead_letters
+
+
+def test_scheduler_dead_letters_permanent_and_exhausted_jobs():
+    relay = FlakyRelay({
+        "rejected@example.org": [aiosmtplib.SMTPResponseException(550, "no such user")],
+        "flaky@example.org": [aiosmtplib.SMTPResponseException(421, "busy")] * 5,
+    })
+
+    scheduler = run_scheduler(
+        relay, ["rejected@example.org", "flaky@example.org", "ok@example.org"],
+        max_attempts=2, breaker=CircuitBreaker(10, 0.01),
+    )
+
+    assert relay.delivered == ["ok@example.org"]
+    dead = {job.to_email: job.attempts for job in scheduler.dead_letters}
+    assert dead == {"rejected@example.org": 1, "flaky@example.org": 2}
+
+
+def test_stop_waits_for_delayed_retries():
+    relay = FlakyRelay({"a@example.org": [aiosmtplib.SMTPServerDisconnected("gone")]})
+
+    async def run():
+        scheduler = DeliveryScheduler(send_func=relay, rate=1000, burst=100, backoff_base=0.4, backoff_max=0.4)
+        scheduler.submit(build_email_message("a@example.org", "Status", "Hallo"))
+        while not scheduler._delayed:
+            await asyncio.sleep(0.01)
+        # The retry is 0.2-0.4s away when the drain starts
+        await scheduler.stop(timeout=5)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+
+    assert relay.delivered == ["a@example.org"]
+    assert scheduler.stats()["scheduled_retries"] == 0
@@ -0,0 +1,139 @@
+"""Email delivery through Celery eager mode and the in-process scheduler"""
+import asyncio
+import smtplib
+
+import aiosmtplib
+import pytest
+
+from app.config import settings
+from app.core import delivery
+from app.tasks.notifications import send_email_task
+
+
+@pytest.fixture
+def fresh_scheduler(monkeypatch):
+    # The scheduler binds to the loop it first runs on; each test gets its own
+    monkeypatch.setattr(delivery, "_scheduler", None)
+
+
+def test_eager_celery_queue_email_inside_running_loop(smtp_sink, fresh_scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_DELIVERY", "celery")
+    monkeypatch.setattr(settings, "CELERY_TASK_ALWAYS_EAGER", True)
+
+    async def request_handler():
+        queued = await delivery.queue_email("citizen@example.org", "Eingangsbestätigung", "Hallo")
+        await delivery.shutdown_delivery_scheduler()
+        return queued
+
+    assert asyncio.run(request_handler()) is True
+    assert [envelope.rcpt_tos for envelope in smtp_sink.envelopes] == [["citizen@example.org"]]
+
+
+def test_send_email_task_runs_inside_running_loop(smtp_sink):
+    async def request_handler():
+        # What an eager .delay() does: the task body runs on the loop thread
+        return send_email_task.apply(args=("citizen@example.org", "Status", "Hallo"))
+
+    result = asyncio.run(request_handler())
+
+    assert result.successful(), result.traceback
+    assert len(smtp_sink.envelopes) == 1
+
+
+@pytest.mark.parametrize("exc, permanent", [
+    (aiosmtplib.SMTPResponseException(550, "mailbox unavailable"), True),
+    (aiosmtplib.SMTPResponseException(421, "try again later"), False),
+    (aiosmtplib.SMTPRecipientsRefused([aiosmtplib.SMTPRecipientRefused(550, "unknown", "a@example.org")]), True),
+    (smtplib.SMTPDataError(554, b"rejected"), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.org": (550, b"unknown")}), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.org": (550, b"unknown"), "b@example.org": (451, b"later")}), False),
+    (ConnectionRefusedError(), False),
+])
+def test_permanent_failures_of_both_smtp_clients(exc, permanent):
+    assert delivery.is_permanent_failure(exc) is permanent
+
+
+class DroppingHandler:
+    """Accepts mail but hangs up on listed recipients (each for `drops[rcpt]` attempts)"""
+
+    def __init__(self, drops):
+        self.drops = dict(drops)
+        self.delivered = []
+
+    async def handle_DATA(self, server, session, envelope):
+        recipient = envelope.rcpt_tos[0]
+        if self.drops.get(recipient, 0) > 0:
+            self.drops[recipient] -= 1
+            server.transport.close()
+            return "421 closing"
+        self.delivered.append(recipient)
+        return "250 OK"
+
+
+@pytest.fixture
+def dropping_sink(smtp_sink, monkeypatch):
+    from aiosmtpd.controller import Controller
+    from tests.conftest import free_port
+
+    def start(drops):
+        handler = DroppingHandler(drops)
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+        controllers.append(controller)
+        return handler
+
+    controllers = []
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+def test_bulk_send_survives_repeated_disconnects(dropping_sink):
+    from app.utils.email import build_email_message, send_bulk_messages
+
+    recipients = [f"staff{i}@example.org" for i in range(6)]
+    # Two recoverable hang-ups in one batch, and one recipient that always drops
+    handler = dropping_sink({recipients[1]: 1, recipients[3]: 1, recipients[4]: 5})
+    messages = [build_email_message(to, "Tageszusammenfassung", "Hallo") for to in recipients]
+
+    result = asyncio.run(send_bulk_messages(messages))
+
+    assert result.sent == 5
+    assert [message["To"] for message, _ in result.failed] == [recipients[4]]
+    assert isinstance(result.failed[0][1], aiosmtplib.SMTPServerDisconnected)
+    assert handler.delivered == [to for to in recipients if to != recipients[4]]
+
+
+def test_daily_summaries_requeue_failed_recipients(dropping_sink, fresh_scheduler, supervisor, monkeypatch):
+    from app.core.summaries import send_daily_summaries
+
+    # The first attempt and the pooled reconnect both drop; the scheduler's retry gets through
+    handler = dropping_sink({"supervisor@example.org": 2})
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 0.01)
+
+    async def run_job():
+        sent = await send_daily_summaries()
+        stats = delivery.get_delivery_scheduler().stats()
+        await delivery.shutdown_delivery_scheduler()
+        return sent, stats
+
+    _, stats = asyncio.run(run_job())
+
+    assert handler.delivered.count("supervisor@example.org") == 1
+    assert stats["scheduled_retries"] + stats["queued"] + stats["in_flight"] == 1
+
+
+def test_daily_summary_task_runs_twice_in_one_process(dropping_sink, fresh_scheduler, supervisor, monkeypatch):
+    from app.tasks.notifications import send_daily_summaries_task
+
+    # Each run requeues the supervisor's summary, so each needs a scheduler on its own loop
+    handler = dropping_sink({})
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 0.01)
+
+    for _ in range(2):
+        handler.drops["supervisor@example.org"] = 2
+        result = send_daily_summaries_task.apply()
+        assert result.successful(), result.traceback
+
+    assert handler.delivered.count("supervisor@example.org") == 2
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from app.core.events import EventBus
+
+
+@dataclass
+class Ping:
+    value: int
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    # Route the module-level session hooks to a private bus
+    from app.core import events
+    bus = EventBus()
+    monkeypatch.setattr(events, "event_bus", bus)
+    return bus
+
+
+def test_after_commit_handlers_only_run_after_commit(bus, db):
+    calls = []
+
+    @bus.in_transaction(Ping)
+    def in_transaction(session, batch):
+        calls.append(("in_transaction", [e.value for e in batch]))
+
+    @bus.after_commit(Ping)
+    async def after_commit(batch):
+        calls.append(("after_commit", [e.value for e in batch]))
+
+    async def scenario():
+        bus.publish(db, Ping(1), Ping(2))
+        await asyncio.sleep(0)
+        assert calls == []
+        db.commit()
+        assert calls == [("in_transaction", [1, 2])]
+        await bus.drain()
+
+    asyncio.run(scenario())
+    assert calls == [("in_transaction", [1, 2]), ("after_commit", [1, 2])]
+
+
+def test_rollback_discards_events(bus, db):
+    calls = []
+
+    @bus.after_commit(Ping)
+    async def after_commit(batch):
+        calls.append(batch)
+
+    bus.publish(db, Ping(1))
+    db.rollback()
+    db.commit()
+    bus.wait_background()
+    assert calls == []
+
+
+def test_commit_without_loop_does_not_block_and_keeps_follow_up_tasks(bus, db):
+    release = threading.Event()
+    flushed = threading.Event()
+
+    async def coalesced_flush():
+        await asyncio.sleep(0.05)
+        flushed.set()
+
+    @bus.after_commit(Ping)
+    async def slow_handler(batch):
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+        asyncio.get_running_loop().create_task(coalesced_flush())
+
+    bus.publish(db, Ping(1))
+    started = time.monotonic()
+    db.commit()
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    bus.wait_background(timeout=5)
+    # The loop outlives the handler, so the task it scheduled still runs
+    assert flushed.wait(timeout=5)
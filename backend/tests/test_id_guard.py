@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.core import id_guard
+from app.core.application_ids import format_application_id
+from app.core.id_guard import ApplicationIdFilter, BloomFilter, guard_application_lookup
+from app.database import engine
+from app.models.application import Application, ApplicationType
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=20_000, error_rate=0.01)
+    members = [f"LB-2026-{n:08d}" for n in range(20_000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    strangers = [f"LB-2025-{n:08d}" for n in range(50_000)]
+    false_positive_rate = sum(stranger in bloom for stranger in strangers) / len(strangers)
+    assert false_positive_rate < 0.015
+
+
+def make_application(db, application_id, submitted_at=None):
+    db.add(Application(
+        id=application_id,
+        application_type=ApplicationType.ANMELDUNG,
+        email="import@example.org",
+        first_name="Imported",
+        last_name="Row",
+        date_of_birth="1980-01-01",
+        submitted_at=submitted_at or datetime.utcnow(),
+    ))
+    db.commit()
+
+
+@pytest.fixture
+def id_filter(app, monkeypatch):
+    id_filter = ApplicationIdFilter()
+    monkeypatch.setattr(id_guard, "application_id_filter", id_filter)
+    id_filter.rebuild()
+    return id_filter
+
+
+def wrong_check_digit(application_id):
+    return application_id[:-1] + str((int(application_id[-1]) + 1) % 10)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def lookup(application_id):
+    request = SimpleNamespace(client=SimpleNamespace(host="198.51.100.1"), headers=Headers({}))
+    asyncio.run(guard_application_lookup(request, application_id))
+
+
+def test_filter_misses_never_reach_the_database(id_filter):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    guesses = [
+        format_application_id(2026, 424242, settings.APPLICATION_ID_SCRAMBLE_KEY.encode()),
+        "LB-2024-123456",  # legacy formats are accepted but still filtered
+        "APP-DEADBEEF",
+    ]
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        for application_id in guesses:
+            with pytest.raises(HTTPException) as error:
+                lookup(application_id)
+            assert error.value.status_code == 404
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert statements == []
+
+
+def test_rebuild_picks_up_rows_written_outside_the_app(id_filter, db):
+    application_id = format_application_id(2019, 123456, settings.APPLICATION_ID_SCRAMBLE_KEY.encode())
+    make_application(db, application_id, submitted_at=datetime(2019, 3, 1))
+    assert not id_filter.might_exist(application_id)
+
+    id_filter.rebuild()
+    assert id_filter.might_exist(application_id)
+    lookup(application_id)
+
+
+def test_ids_are_shared_between_workers_through_redis(app, monkeypatch):
+    monkeypatch.setattr(settings, "BLOOM_REBUILD_SECONDS", 0)
+    server = fakeredis.FakeServer()
+    workers = [ApplicationIdFilter("redis", fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    try:
+        assert wait_for(lambda: all(worker.ready for worker in workers))
+        assert wait_for(lambda: len(workers[1].client.pubsub_channels()) == 1)
+
+        application_id = format_application_id(2026, 777, settings.APPLICATION_ID_SCRAMBLE_KEY.encode())
+        workers[0].register([application_id])
+
+        assert wait_for(lambda: workers[1].might_exist(application_id))
+    finally:
+        for worker in workers:
+            worker.stop()
+
+
+def test_unknown_and_malformed_ids_get_404(id_filter):
+    for application_id in (
+        format_application_id(2026, 99_999_999, settings.APPLICATION_ID_SCRAMBLE_KEY.encode()),
+        wrong_check_digit(format_application_id(2026, 7, settings.APPLICATION_ID_SCRAMBLE_KEY.encode())),
+        "'; DROP TABLE applications; --",
+    ):
+        with pytest.raises(HTTPException) as error:
+            lookup(application_id)
+        assert error.value.status_code == 404
+
+
+def test_overfull_filter_is_rebuilt_in_the_background(id_filter, db, monkeypatch):
+    rebuilt = threading.Event()
+    original = ApplicationIdFilter.rebuild
+
+    def rebuild(self, db=None):
+        assert threading.current_thread().name == "id-filter-rebuild"
+        original(self, db)
+        rebuilt.set()
+
+    monkeypatch.setattr(ApplicationIdFilter, "rebuild", rebuild)
+    monkeypatch.setattr(settings, "BLOOM_MIN_CAPACITY", 10)
+    small = BloomFilter(capacity=2)
+    id_filter._filter = small
+
+    committed = [f"LB-2026-00000{n}" for n in (1, 2, 3)]
+    for application_id in committed:
+        make_application(db, application_id)
+    id_filter.add_many(committed)
+
+    assert rebuilt.wait(timeout=5)
+    assert id_filter._filter is not small
+    assert all(id_filter.might_exist(application_id) for application_id in committed)
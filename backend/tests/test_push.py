@@ -0,0 +1,56 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+
+from app.config import settings
+from app.core import push
+from app.core.push import PushBroker
+
+
+def test_memory_broker_delivers_to_topic_subscribers():
+    async def scenario():
+        broker = PushBroker("memory")
+        watcher = broker.subscribe("application:LB-1")
+        other = broker.subscribe("application:LB-2")
+        broker.publish(["application:LB-1"], "status", {"new_status": "pruefung"})
+        event = watcher.queue.get_nowait()
+        return event, other.queue.empty()
+
+    event, other_empty = asyncio.run(scenario())
+    assert (event.event, event.data) == ("status", {"new_status": "pruefung"})
+    assert other_empty
+
+
+def test_slow_subscriber_loses_oldest_events(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_QUEUE_SIZE", 2)
+
+    async def scenario():
+        broker = PushBroker("memory")
+        subscription = broker.subscribe("staff:1")
+        for n in range(3):
+            broker.publish(["staff:1"], "status", {"n": n})
+        return [subscription.queue.get_nowait().data["n"] for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_redis_broker_fans_out_across_workers(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(push, "get_redis_client", lambda: fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(push, "get_async_redis_client", lambda: fakeredis.aioredis.FakeRedis(server=server))
+
+    async def scenario():
+        # Two workers: the stream is open on one, the change happens on the other
+        streaming, publishing = PushBroker("redis"), PushBroker("redis")
+        await streaming.start()
+        subscription = streaming.subscribe("application:LB-1")
+        publishing.publish(["application:LB-1"], "status", {"new_status": "entscheidung"})
+        try:
+            return await asyncio.wait_for(subscription.queue.get(), timeout=5)
+        finally:
+            await publishing.stop()
+            await streaming.stop()
+
+    event = asyncio.run(scenario())
+    assert (event.event, event.data) == ("status", {"new_status": "entscheidung"})
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.core import rate_limit
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitBackend, RedisRateLimitBackend, TokenBucketLimiter
+from app.utils.helpers import get_client_ip
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return InMemoryRateLimitBackend()
+    return RedisRateLimitBackend(fakeredis.FakeRedis(), "test")
+
+
+def test_rate_limit_backend_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def test_bucket_allows_burst_then_refills(backend, clock):
+    limiter = TokenBucketLimiter("login-ip", per_minute=60, capacity=3)
+
+    assert [limiter.hit("10.0.0.1", backend)[0] for _ in range(3)] == [True] * 3
+    allowed, retry_after = limiter.hit("10.0.0.1", backend)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert limiter.hit("10.0.0.2", backend)[0]  # buckets are per key
+
+    clock[0] += 1.0
+    assert limiter.hit("10.0.0.1", backend)[0]
+    assert not limiter.hit("10.0.0.1", backend)[0]
+
+    clock[0] += 60
+    assert [limiter.hit("10.0.0.1", backend)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_reset_restores_the_full_budget(backend, clock):
+    limiter = TokenBucketLimiter("login-user", per_minute=1, capacity=1)
+    assert limiter.hit("anna", backend)[0]
+    assert not limiter.hit("anna", backend)[0]
+    limiter.reset("anna", backend)
+    assert limiter.hit("anna", backend)[0]
+
+
+def test_redis_buckets_are_shared_between_workers(clock):
+    server = fakeredis.FakeServer()
+    workers = [RedisRateLimitBackend(fakeredis.FakeRedis(server=server), "test") for _ in range(3)]
+    limiter = TokenBucketLimiter("login-ip", per_minute=60, capacity=3)
+
+    assert [limiter.hit("10.0.0.1", worker)[0] for worker in workers] == [True] * 3
+    assert not limiter.hit("10.0.0.1", workers[0])[0]
+
+
+def test_redis_outage_allows_requests(clock):
+    server = fakeredis.FakeServer()
+    backend = RedisRateLimitBackend(fakeredis.FakeRedis(server=server), "test")
+    server.connected = False
+    assert backend.consume("login-ip:10.0.0.1", 1, 1) == (True, 0.0)
+    assert backend.errors == 1
+
+
+def request_from(peer, **headers):
+    return SimpleNamespace(client=SimpleNamespace(host=peer), headers=Headers(headers))
+
+
+def test_forwarded_headers_ignored_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+    request = request_from("203.0.113.7", **{"X-Forwarded-For": "1.2.3.4", "X-Real-IP": "5.6.7.8"})
+    assert get_client_ip(request) == "203.0.113.7"
+
+
+def test_right_most_untrusted_hop_is_the_client(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8, 192.168.1.5")
+    # The client forged the first entry; the trusted proxies appended the rest
+    request = request_from("10.0.0.2", **{"X-Forwarded-For": "1.2.3.4, 198.51.100.9, 192.168.1.5"})
+    assert get_client_ip(request) == "198.51.100.9"
+
+    assert get_client_ip(request_from("10.0.0.2", **{"X-Real-IP": "198.51.100.10"})) == "198.51.100.10"
+    assert get_client_ip(request_from("10.0.0.2")) == "10.0.0.2"
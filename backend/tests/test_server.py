@@ -0,0 +1,19 @@
+import pytest
+
+from app import server
+from app.config import settings
+
+
+@pytest.mark.parametrize("workers, max_requests", [(4, 0), (1, 10000)])
+def test_memory_token_store_is_refused_for_several_or_recycled_workers(workers, max_requests, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_STORE_BACKEND", "memory")
+    with pytest.raises(SystemExit, match="TOKEN_STORE_BACKEND"):
+        server.check_process_backends(workers, max_requests)
+
+
+def test_single_worker_or_shared_token_store_is_accepted(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_STORE_BACKEND", "memory")
+    server.check_process_backends(1, 0)
+
+    monkeypatch.setattr(settings, "TOKEN_STORE_BACKEND", "redis")
+    server.check_process_backends(8, 10000)
@@ -0,0 +1,42 @@
+from app.core import events, subscribers
+from app.models.application import ApplicationStatus, StatusUpdate
+
+
+def test_assign_emits_one_event_when_moving_to_in_progress(client, db, supervisor, submitted_application, monkeypatch):
+    status_changes, notifications = [], []
+
+    async def record(batch):
+        status_changes.extend(batch)
+
+    async def notify(email, application_id, status, custom_message="", language="de"):
+        notifications.append((application_id, status, custom_message, language))
+
+    monkeypatch.setitem(events.event_bus._after_commit, events.StatusChanged, [record])
+    monkeypatch.setattr(subscribers, "send_status_notification", notify)
+
+    response = client.post(
+        f"/api/v1/staff/applications/{submitted_application['id']}/assign",
+        params={"case_worker_id": supervisor["user"].id},
+        headers=supervisor["headers"],
+    )
+
+    assert response.status_code == 200, response.text
+    assert status_changes == []
+    history = db.query(StatusUpdate).filter(
+        StatusUpdate.application_id == submitted_application["id"],
+        StatusUpdate.old_status.isnot(None),
+    ).all()
+    assert [(row.old_status, row.new_status) for row in history] == [
+        (ApplicationStatus.EINGEGANGEN, ApplicationStatus.IN_BEARBEITUNG)
+    ]
+    # Only the localized template, no hard-coded text
+    assert notifications == [(submitted_application["id"], ApplicationStatus.IN_BEARBEITUNG, "", "de")]
+
+    # Reassigning does not change the status again, so the citizen is not notified
+    notifications.clear()
+    client.post(
+        f"/api/v1/staff/applications/{submitted_application['id']}/assign",
+        params={"case_worker_id": supervisor["user"].id},
+        headers=supervisor["headers"],
+    )
+    assert notifications == []
@@ -0,0 +1,26 @@
+"""Cold-start budget for `import app.main` (report: python -m benchmarks.startup_time)"""
+import os
+
+import pytest
+
+from benchmarks.startup_time import measure
+
+# About 1.5x the measured cold import (~1.3 s, over half of it FastAPI itself), so a
+# regression of a few hundred milliseconds fails; set STARTUP_BUDGET_MS on slower machines
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 2000))
+
+
+@pytest.fixture(scope="module")
+def startup_report():
+    return measure("app.main", runs=3)
+
+
+def test_heavy_modules_are_imported_lazily(startup_report):
+    assert startup_report["eager_heavy_modules"] == []
+
+
+def test_cold_import_within_budget(startup_report):
+    assert startup_report["total_ms"] <= STARTUP_BUDGET_MS, (
+        f"import app.main took {startup_report['total_ms']} ms (budget {STARTUP_BUDGET_MS} ms); "
+        f"slowest: {startup_report['slowest_modules_ms'][:5]}"
+    )
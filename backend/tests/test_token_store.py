@@ -0,0 +1,97 @@
+import fakeredis
+import pytest
+from jose import jwt
+
+from app.config import settings
+from app.core import token_store
+from app.core.token_store import (
+    InMemoryRefreshTokenStore, RedisRefreshTokenStore, RedisRevocationStore, RefreshTokenReuse, RevocationSet
+)
+
+
+def decode(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_revocations_expire_with_the_token(clock):
+    revoked = RevocationSet()
+    revoked.add("aa" * 16, expires_at=clock[0] + 60)
+    assert "aa" * 16 in revoked
+
+    clock[0] += 61
+    assert "aa" * 16 not in revoked
+    revoked.add("bb" * 16, expires_at=clock[0] + 60)  # purges the expired entry
+    assert len(revoked) == 1
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_store(request):
+    """Factory of stores; with Redis every instance shares one server (= one per worker)"""
+    if request.param == "memory":
+        store = InMemoryRefreshTokenStore(RevocationSet())
+        return lambda: store
+    server = fakeredis.FakeServer()
+
+    def make():
+        client = fakeredis.FakeRedis(server=server)
+        return RedisRefreshTokenStore(RedisRevocationStore(client, "test"), client, "test")
+    return make
+
+
+def test_rotation_issues_successor_in_same_family(make_store):
+    store = make_store()
+    first = decode(store.issue("anna"))
+    second = decode(make_store().rotate(first))
+
+    assert second["fam"] == first["fam"] and second["jti"] != first["jti"]
+    assert first["jti"] in store.revoked
+    assert decode(make_store().rotate(second))["fam"] == first["fam"]
+
+
+def test_reuse_revokes_the_whole_family(make_store):
+    store = make_store()
+    first = decode(store.issue("anna"))
+    second = decode(store.rotate(first))
+
+    with pytest.raises(RefreshTokenReuse):
+        make_store().rotate(first)  # replayed from another worker
+    with pytest.raises(RefreshTokenReuse):
+        store.rotate(second)  # the legitimate successor is gone too
+    assert second["jti"] in store.revoked
+
+
+def test_unknown_families_are_rejected(make_store):
+    forged = {"sub": "anna", "jti": "cc" * 16, "fam": "dd" * 16, "exp": 2_000_000_000}
+    with pytest.raises(RefreshTokenReuse):
+        make_store().rotate(forged)
+
+
+def test_revoke_user_ends_every_family(make_store):
+    store = make_store()
+    tokens = [decode(store.issue("anna")) for _ in range(2)]
+    other = decode(store.issue("ben"))
+
+    make_store().revoke_user("anna")
+
+    for payload in tokens:
+        assert payload["jti"] in store.revoked
+        with pytest.raises(RefreshTokenReuse):
+            store.rotate(payload)
+    assert decode(store.rotate(other))["sub"] == "ben"
+
+
+def test_redis_keys_expire_with_the_tokens():
+    client = fakeredis.FakeRedis()
+    store = RedisRefreshTokenStore(RedisRevocationStore(client, "test"), client, "test")
+    payload = decode(store.issue("anna"))
+    store.rotate(payload)
+
+    assert 0 < client.ttl(f"test:refresh-family:{payload['fam']}") <= token_store.REFRESH_TOKEN_LIFETIME_SECONDS
+    assert 0 < client.pttl(f"test:revoked:{payload['jti']}") <= (payload["exp"] - token_store.time.time()) * 1000 + 1000